@@ -1,31 +1,123 @@
+# Startup path: only Tk, the drag-and-drop extension and the standard modules
+# below are imported before the window is shown. The clipboardconcat core,
+# the content cache, pyperclip, subprocess, tempfile and the dialogs are
+# imported where they are first used (see finish_startup), and
+# benchmarks/bench_startup.py keeps it that way.
 import tkinter as tk
 from tkinter.constants import DISABLED, NORMAL
 from tkinterdnd2 import DND_FILES, TkinterDnD
-import pyperclip
+import logging
 import os
-import tempfile
-import subprocess
 import sys
+import threading
+import time
+
+logger = logging.getLogger("clipboardconcat.app")
+
+# How often the Tk thread refreshes the status from a running collection job.
+PROGRESS_POLL_MS = 100
+# How often the Tk thread checks whether watch mode patched the result.
+WATCH_REFRESH_MS = 250
+# How often the Tk thread checks on (or, for Tk's own clipboard, feeds) a clipboard transfer.
+CLIPBOARD_POLL_MS = 10
+
+
+class CollectionJob:
+    """
+    State of one drop being processed on a background thread.
+
+    The worker only writes plain attributes; the Tk thread reads them from an
+    `after` poll, so no widget is ever touched off the main thread. Output is
+    streamed into an OutputSpool rather than kept as one big string; in watch
+    mode it is an IncrementalConcat that can be patched afterwards.
+    """
+
+    def __init__(self, paths, instructions="", read_workers=None, file_filter=None, cache=None, watch=False,
+                 dedup=False, max_tokens=None, truncate_last=False):
+        from clipboardconcat import DEFAULT_READ_WORKERS, ConcatStats, DropTrace, IncrementalConcat, OutputSpool
+
+        self.paths = paths
+        self.instructions = instructions
+        self.read_workers = read_workers or DEFAULT_READ_WORKERS
+        self.file_filter = file_filter
+        self.cache = cache
+        self.watch = watch
+        self.dedup = dedup
+        self.max_tokens = max_tokens
+        self.truncate_last = truncate_last
+        self.cancel_event = threading.Event()
+        self.stats = ConcatStats()
+        self.trace = DropTrace()
+        self.output = (
+            IncrementalConcat(paths, instructions, file_filter, cache, dedup, max_tokens, truncate_last) if watch
+            else OutputSpool()
+        )
+        self.done = False
+        self.error = None
+
+    def run(self):
+        """Collects the output chunks for `self.paths`. Runs on the worker thread."""
+        from clipboardconcat import iter_concat_chunks
 
-try:
-    import pathspec
-    PATHSPEC_AVAILABLE = True
-    print("DEBUG: 'pathspec' library imported successfully.")
-except ImportError:
-    PATHSPEC_AVAILABLE = False
-    print("DEBUG: 'pathspec' library not found. .gitignore processing will be disabled.")
+        start = time.perf_counter()
+        try:
+            if self.watch:
+                if self.output.build(self.stats, self.cancel_event, self.read_workers, self.trace):
+                    self.stats = self.output.current_stats
+                return
+            for chunk in iter_concat_chunks(
+                self.paths, self.instructions, read_workers=self.read_workers, file_filter=self.file_filter,
+                stats=self.stats, cancel_event=self.cancel_event, cache=self.cache, trace=self.trace, dedup=self.dedup,
+                max_tokens=self.max_tokens, truncate_last=self.truncate_last,
+            ):
+                self.output.write(chunk)
+        except Exception as e:
+            logger.exception("Collection failed")
+            self.error = e
+        finally:
+            self.trace.add("collect", time.perf_counter() - start)
+            if self.cancel_event.is_set() or self.error is not None:
+                self.output.close()  # Nobody will read a cancelled or failed result.
+            self.done = True
 
 
 class TextCollectorApp:
-    def __init__(self, root):
+    def __init__(self, root, read_workers=None, file_filter=None, use_cache=True, trace_dir=None):
+        """
+        Shows the drop target right away; the other controls, the content
+        cache and the core are set up by finish_startup once the window is on
+        screen.
+
+        read_workers: file read threads (None for the core's default).
+        trace_dir: if given, a JSON trace (timings, counters, slowest files) is written there for every drop.
+        """
         self.root = root
+        self.read_workers = read_workers
+        self.file_filter = file_filter
+        self.use_cache = use_cache
+        self.trace_dir = trace_dir
+        self.cache = None
+        self.started = False
         self.root.title("ClipboardConcat")
         # Adjusted window size - can be tweaked further if needed
-        self.root.geometry("580x500") 
+        self.root.geometry("580x530") 
 
         self.pathspec_warning_shown = False
-        self.final_text_to_copy = ""
-        self.draggable_file_path = os.path.join(tempfile.gettempdir(), "ClipboardConcat_Output.txt")
+        self.output = None  # OutputSpool (or IncrementalConcat in watch mode) of the last completed drop
+        self.output_trace = None  # DropTrace of that drop; output actions add their own timings to it
+        self.output_trace_path = None
+        self.output_stats = None
+        self.output_max_tokens = None  # token budget the last drop was collected with
+        self.drop_count = 0
+        self.current_job = None
+        self.current_copy = None  # ClipboardCopy in progress
+        self.clipboard_backend = None  # chosen on the first copy
+        self.last_drop = None  # (paths, instructions), re-run when watch mode is switched on
+        self.watch_session = None
+        self.watch_var = tk.BooleanVar(value=False)
+        self.dedup_var = tk.BooleanVar(value=False)
+        self.truncate_var = tk.BooleanVar(value=False)
+        self.draggable_file_path = None  # set by finish_startup
 
         # --- Drop Target (Now first major UI element) ---
         self.drop_target_label = tk.Label(
@@ -35,7 +127,36 @@ class TextCollectorApp:
         self.drop_target_label.pack(pady=(10,5), padx=10, expand=True, fill=tk.BOTH) # Give it some padding
         self.drop_target_label.drop_target_register(DND_FILES)
         self.drop_target_label.dnd_bind('<<Drop>>', self.on_drop)
-        
+
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.root.bind("<Map>", self.on_first_map)
+
+    def on_first_map(self, event):
+        if event.widget is not self.root:
+            return
+        self.root.unbind("<Map>")
+        self.root.after_idle(self.finish_startup)
+
+    def finish_startup(self):
+        """Builds the remaining controls and opens the content cache. Safe to call more than once."""
+        if self.started:
+            return
+        self.started = True
+        import tempfile
+
+        self.draggable_file_path = os.path.join(tempfile.gettempdir(), "ClipboardConcat_Output.txt")
+        from clipboardconcat import PATHSPEC_AVAILABLE
+        if PATHSPEC_AVAILABLE:
+            logger.debug("'pathspec' library found.")
+        else:
+            logger.debug("'pathspec' library not found. .gitignore processing will be disabled.")
+        if self.use_cache:
+            try:
+                from clipboardconcat.cache import ContentCache
+                self.cache = ContentCache()
+            except Exception as e:  # e.g. read-only home directory; run without the cache
+                logger.error("Could not open content cache, continuing without it: %s", e)
+
         # --- Instructions Input (Now below the drop target) ---
         instructions_frame = tk.Frame(self.root)
         instructions_frame.pack(pady=5, padx=10, fill=tk.X)
@@ -45,10 +166,34 @@ class TextCollectorApp:
             font=("Arial", 10)
         )
         instructions_label.pack(side=tk.LEFT, anchor='w')
+        self.chk_watch = tk.Checkbutton(
+            instructions_frame, text="Watch for changes", variable=self.watch_var, command=self.on_watch_toggled,
+            font=("Arial", 10)
+        )
+        self.chk_watch.pack(side=tk.RIGHT, anchor='e')
+        self.chk_dedup = tk.Checkbutton(
+            instructions_frame, text="Skip duplicates", variable=self.dedup_var, command=self.on_dedup_toggled,
+            font=("Arial", 10)
+        )
+        self.chk_dedup.pack(side=tk.RIGHT, anchor='e')
         self.instructions_text_widget = tk.Text(
             self.root, height=3, pady=5, padx=5, relief=tk.RIDGE, bd=1, font=("Arial", 10), wrap=tk.WORD
         ) # Reduced height slightly
-        self.instructions_text_widget.pack(pady=(0, 10), padx=10, fill=tk.X)
+        self.instructions_text_widget.pack(pady=(0, 5), padx=10, fill=tk.X)
+
+        # --- Token Budget (optional cap on the result's size) ---
+        budget_frame = tk.Frame(self.root)
+        budget_frame.pack(pady=(0, 10), padx=10, fill=tk.X)
+        budget_label = tk.Label(budget_frame, text="Token budget (optional, ~4 characters per token):", font=("Arial", 10))
+        budget_label.pack(side=tk.LEFT, anchor='w')
+        self.budget_entry = tk.Entry(budget_frame, width=10, font=("Arial", 10))
+        self.budget_entry.pack(side=tk.LEFT, padx=5)
+        self.budget_entry.bind("<Return>", self.on_budget_changed)
+        self.chk_truncate = tk.Checkbutton(
+            budget_frame, text="Truncate last file", variable=self.truncate_var, command=self.on_budget_changed,
+            font=("Arial", 10)
+        )
+        self.chk_truncate.pack(side=tk.RIGHT, anchor='e')
 
 
         # --- Action Buttons Frame (Below instructions) ---
@@ -70,59 +215,158 @@ class TextCollectorApp:
         )
         self.btn_prepare_draggable.pack(side=tk.LEFT, expand=True, padx=5)
 
+        self.btn_cancel = tk.Button(
+            actions_frame, text="Cancel", command=self.on_cancel, state=DISABLED
+        )
+        self.btn_cancel.pack(side=tk.LEFT, expand=True, padx=5)
+
+        self.btn_clear_cache = tk.Button(
+            actions_frame, text="Clear Cache", command=self.action_clear_cache,
+            state=NORMAL if self.cache is not None else DISABLED
+        )
+        self.btn_clear_cache.pack(side=tk.LEFT, expand=True, padx=5)
+
 
         # --- Status Label (At the bottom) ---
         self.status_label = tk.Label(self.root, text="Ready. Drop files to begin.", pady=10, font=("Arial", 9), wraplength=560, justify=tk.LEFT) # Slightly smaller font
         self.status_label.pack(fill=tk.X, padx=10, pady=(0,5))
 
-        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
-
     def on_closing(self):
+        if self.started:  # Otherwise there is nothing running and no controls yet.
+            self.stop_watching()
+            self.cancel_clipboard_copy()
+            self.cancel_current_job()
+            self.set_output(None)
+        if self.cache is not None:
+            try:
+                self.cache.close()
+            except Exception as e:
+                logger.error("Could not close content cache: %s", e)
         try:
-            if os.path.exists(self.draggable_file_path): # Check attribute existence first
+            if self.draggable_file_path and os.path.exists(self.draggable_file_path):
                 os.remove(self.draggable_file_path)
-                print(f"DEBUG: Cleaned up draggable file: {self.draggable_file_path}")
-        except AttributeError: # If self.draggable_file_path was never set
-            pass 
+                logger.debug("Cleaned up draggable file: %s", self.draggable_file_path)
         except OSError as e:
-            print(f"ERROR: Could not delete draggable file {getattr(self, 'draggable_file_path', 'N/A')} on closing: {e}")
+            logger.error("Could not delete draggable file %s on closing: %s", getattr(self, 'draggable_file_path', 'N/A'), e)
         self.root.destroy()
 
+    def has_output(self):
+        return self.output is not None and self.output.char_count > 0
+
+    def set_output(self, output):
+        """Replaces the current result, releasing the previous one's memory or temp file."""
+        if self.output is not None:
+            self.output.close()
+        self.output = output
+        self.output_trace = self.output_trace_path = self.output_stats = None
+
     def update_action_buttons_state(self):
-        new_state = NORMAL if self.final_text_to_copy and self.final_text_to_copy.strip() else DISABLED
+        # Kept disabled while a clipboard transfer is still reading the result.
+        new_state = NORMAL if self.has_output() and self.current_copy is None else DISABLED
         self.btn_copy_clipboard.config(state=new_state)
         self.btn_save_to_file.config(state=new_state)
         self.btn_prepare_draggable.config(state=new_state)
 
     def action_copy_to_clipboard(self):
-        if not (hasattr(self, 'final_text_to_copy') and self.final_text_to_copy and self.final_text_to_copy.strip()):
+        if not self.has_output():
             self.status_label.config(text="No content to copy.")
             return
+        if self.current_copy is not None:
+            return
+        from clipboardconcat.clipboard import select_backend
+
+        if self.clipboard_backend is None:
+            self.clipboard_backend = select_backend(self.root)
+            logger.debug("Clipboard backend: %s", self.clipboard_backend.name)
+        self.start_clipboard_copy()
+
+    def start_clipboard_copy(self):
+        """Streams the result to the clipboard off the Tk thread; finish_clipboard_copy is called when done."""
+        from clipboardconcat.clipboard import ClipboardCopy
+
+        copy = ClipboardCopy(self.clipboard_backend, self.output.iter_chunks())
+        self.current_copy = copy
+        self.update_action_buttons_state()
+        self.status_label.config(text=f"Copying to clipboard ({copy.backend.name})...")
         try:
-            pyperclip.copy(self.final_text_to_copy)
-            # Try to preserve existing count details if possible, or simplify
-            status_summary = "Result copied to clipboard!"
-            # Get details from previous status if they exist
-            current_status_lines = self.status_label.cget("text").splitlines()
-            detail_lines = [line for line in current_status_lines if "file(s) processed" in line or "Total lines" in line or "skipped by .gitignore" in line]
-            if detail_lines:
-                self.status_label.config(text=status_summary + "\n" + "\n".join(detail_lines))
-            else:
-                self.status_label.config(text=status_summary)
-
-        except pyperclip.PyperclipException as e:
+            copy.start()
+        except Exception as e:
+            self.current_copy = None
+            self.update_action_buttons_state()
             self.status_label.config(text=f"Error copying to clipboard: {e}")
-        except Exception as e: 
-            self.status_label.config(text=f"An unexpected error occurred during copy: {e}")
+            return
+        self.root.after(CLIPBOARD_POLL_MS, self.poll_clipboard_copy, copy, self.finish_clipboard_copy)
+
+    def poll_clipboard_copy(self, copy, on_done):
+        if copy is not self.current_copy:
+            return  # Cancelled by a new drop.
+        if not copy.step():
+            self.root.after(CLIPBOARD_POLL_MS, self.poll_clipboard_copy, copy, on_done)
+            return
+        self.current_copy = None
+        self.update_action_buttons_state()
+        on_done(copy)
+
+    def finish_clipboard_copy(self, copy):
+        from clipboardconcat.clipboard import TkClipboard, format_size
+
+        if copy.error is not None:
+            if not isinstance(copy.backend, TkClipboard) and self.has_output():
+                # A helper that cannot reach the display (or died); Tk's own clipboard still works.
+                logger.warning("Copying with %s failed (%s), falling back to the Tk clipboard", copy.backend.name, copy.error)
+                self.clipboard_backend = TkClipboard(self.root)
+                self.start_clipboard_copy()
+                return
+            self.status_label.config(text=f"Error copying to clipboard: {copy.error}")
+            return
+        self.output_trace.add("clipboard", copy.seconds)
+        self.write_trace()
+        self.show_action_result(
+            f"Result copied to clipboard: {format_size(copy.bytes)} in {copy.seconds:.2f} s ({copy.backend.name})."
+        )
+
+    def cancel_clipboard_copy(self):
+        copy, self.current_copy = self.current_copy, None
+        if copy is not None:
+            copy.cancel()
+
+    def show_action_result(self, status_summary):
+        """Shows `status_summary`, keeping the counts and the (updated) timing line of the current result."""
+        current_status_lines = self.status_label.cget("text").splitlines()
+        detail_lines = [line for line in current_status_lines if "file(s) processed" in line or "Total lines" in line or "skipped by .gitignore" in line or line.startswith(("Duplicates:", "Token budget"))]
+        if self.output_trace is not None and self.output_trace.summary():
+            detail_lines.append(self.output_trace.summary())
+        if detail_lines:
+            self.status_label.config(text=status_summary + "\n" + "\n".join(detail_lines))
+        else:
+            self.status_label.config(text=status_summary)
+
+    def write_trace(self):
+        """Writes the current result's trace file, if tracing is enabled."""
+        if self.output_trace_path is None:
+            return
+        try:
+            self.output_trace.write_json(self.output_trace_path, self.output_stats, paths=self.last_drop[0])
+        except OSError as e:
+            logger.error("Could not write trace file %s: %s", self.output_trace_path, e)
+
+    def action_clear_cache(self):
+        if self.cache is None:
+            return
+        try:
+            self.cache.clear()
+            self.status_label.config(text="Content cache cleared. The next drop reads every file from disk.")
+        except Exception as e:
+            self.status_label.config(text=f"Could not clear the content cache: {e}")
 
     def action_save_to_file(self):
-        if not (hasattr(self, 'final_text_to_copy') and self.final_text_to_copy and self.final_text_to_copy.strip()):
+        if not self.has_output():
             self.status_label.config(text="No content to save.")
             return
-        self.save_to_file(self.final_text_to_copy, "ClipboardConcat_Saved.txt")
+        self.save_to_file(self.output, "ClipboardConcat_Saved.txt")
 
     def action_prepare_draggable_file(self):
-        if not (hasattr(self, 'final_text_to_copy') and self.final_text_to_copy and self.final_text_to_copy.strip()):
+        if not self.has_output():
             self.status_label.config(text="No content to prepare for dragging.")
             return
         
@@ -132,9 +376,11 @@ class TextCollectorApp:
             if not os.path.exists(temp_dir):
                 os.makedirs(temp_dir, exist_ok=True)
 
-            with open(self.draggable_file_path, "w", encoding="utf-8") as f:
-                f.write(self.final_text_to_copy)
-            
+            with self.output_trace.timed("save"):
+                self.output.save_to(self.draggable_file_path)
+            self.write_trace()
+
+            import subprocess
             if sys.platform == "win32":
                 subprocess.Popen(f'explorer /select,"{os.path.normpath(self.draggable_file_path)}"')
             elif sys.platform == "darwin":
@@ -143,18 +389,15 @@ class TextCollectorApp:
                 subprocess.call(["xdg-open", os.path.normpath(os.path.dirname(self.draggable_file_path))])
             
             self.status_label.config(text=f"File ready for dragging at:\n{self.draggable_file_path}\n(File explorer opened to location)")
-            print(f"INFO: Draggable file prepared at {self.draggable_file_path}")
+            logger.info("Draggable file prepared at %s", self.draggable_file_path)
 
         except Exception as e:
             self.status_label.config(text=f"Error preparing draggable file: {e}")
-            print(f"ERROR: Could not prepare draggable file: {e}")
+            logger.error("Could not prepare draggable file: %s", e)
 
     def on_drop(self, event):
-        self.status_label.config(text="Processing...")
-        self.root.update_idletasks()
-        
-        self.final_text_to_copy = "" 
-        self.update_action_buttons_state()
+        self.finish_startup()  # A drop can arrive before the deferred setup ran.
+        self.discard_result()
 
         dropped_items_str = event.data
         if not dropped_items_str:
@@ -166,216 +409,237 @@ class TextCollectorApp:
             self.status_label.config(text="Could not parse dropped item paths.")
             return
 
-        collected_file_contents = []
-        files_processed_count = 0
-        files_skipped_count = 0
-        git_ignored_count = 0
-
-        for item_path_raw in paths:
-            item_path = os.path.normpath(item_path_raw) 
-
-            if not os.path.exists(item_path):
-                # (Error message)
-                continue
-
-            if os.path.isfile(item_path):
-                content, read_success = self.read_file_content(item_path)
-                if read_success:
-                    if collected_file_contents: collected_file_contents.append("\n\n")
-                    collected_file_contents.append(f"--- Content from: {os.path.basename(item_path)} ---\n")
-                    collected_file_contents.append(content)
-                    files_processed_count += 1
-                else:
-                    files_skipped_count +=1
-            elif os.path.isdir(item_path):
-                gitignore_spec = None
-                if PATHSPEC_AVAILABLE:
-                    all_effective_patterns = []
-                    for current_dir_in_walk, _, files_in_current_dir in os.walk(item_path, topdown=True):
-                        if '.git' in _: _.remove('.git')
-                        if '.gitignore' in files_in_current_dir:
-                            gitignore_full_path = os.path.join(current_dir_in_walk, '.gitignore')
-                            gitignore_dir_rel_to_item_path = os.path.relpath(current_dir_in_walk, item_path)
-                            if gitignore_dir_rel_to_item_path == '.': gitignore_dir_rel_to_item_path = ''
-                            try:
-                                with open(gitignore_full_path, 'r', encoding='utf-8') as f_gi:
-                                    for line in f_gi:
-                                        pattern = line.strip()
-                                        if not pattern or pattern.startswith('#'): continue
-                                        is_negation = pattern.startswith('!')
-                                        if is_negation: pattern = pattern[1:]
-                                        
-                                        # Construct effective pattern relative to item_path root
-                                        # pathspec's GitWildMatchPattern handles leading '/' correctly
-                                        # (relative to its .gitignore file's location).
-                                        # We just need to ensure the pattern string itself is correctly scoped
-                                        # if it doesn't have a leading slash, meaning it applies at that level and below.
-                                        # The prefix handles scoping it to the correct subdirectory from item_path.
-                                        current_pattern_for_spec = pattern
-                                        if gitignore_dir_rel_to_item_path:
-                                            # For a pattern like 'foo.txt' or '/foo.txt' in 'sub/.gitignore'
-                                            # it becomes 'sub/foo.txt' for the master spec.
-                                            # If pattern has no leading '/', pathspec treats it as '**/pattern' from its root.
-                                            # If it *has* leading '/', it's from root.
-                                            # Our prefixing makes the pattern absolute from item_path.
-                                            
-                                            # If pattern has a leading slash, it means "rooted" to its .gitignore file's dir
-                                            # So, join(prefix, pattern_without_slash)
-                                            # If pattern does NOT have a leading slash, it can match name anywhere in that dir or subdirs
-                                            # pathspec handles `**/name` if no `/` in pattern.
-                                            # `sub/name` makes it match `name` only inside `sub` or deeper if `name` is `**/*` like.
-
-                                            # Simpler: Pathspec patterns are relative to the root of the PathSpec object.
-                                            # We build ONE PathSpec rooted at item_path.
-                                            # So, patterns from sub-gitignores must be prefixed.
-                                            if pattern.startswith('/'):
-                                                effective_pattern = os.path.join(gitignore_dir_rel_to_item_path, pattern[1:]).replace(os.sep, '/')
-                                            else:
-                                                effective_pattern = os.path.join(gitignore_dir_rel_to_item_path, pattern).replace(os.sep, '/')
-                                        else: # .gitignore in item_path itself
-                                            effective_pattern = pattern.replace(os.sep, '/') # No prefix, pattern is as-is
-                                        
-                                        if is_negation: effective_pattern = '!' + effective_pattern
-                                        all_effective_patterns.append(effective_pattern)
-                            except Exception as e: print(f"ERROR: Failed to read/process {gitignore_full_path}: {e}")
-                    if all_effective_patterns:
-                        try:
-                            gitignore_spec = pathspec.PathSpec.from_lines(
-                                pathspec.patterns.GitWildMatchPattern, all_effective_patterns
-                            )
-                        except Exception as e: print(f"ERROR: Could not create PathSpec for '{item_path}': {e}")
-                elif not self.pathspec_warning_shown:
-                    print("WARNING: 'pathspec' not installed. .gitignore files won't be processed. `pip install pathspec`")
-                    self.pathspec_warning_shown = True
-                
-                for current_root, dirs, filenames in os.walk(item_path, topdown=True):
-                    if '.git' in dirs: dirs.remove('.git')
-                    for filename in filenames:
-                        file_full_path = os.path.join(current_root, filename)
-                        if gitignore_spec:
-                            try:
-                                path_to_check_vs_spec = os.path.relpath(file_full_path, item_path).replace(os.sep, '/')
-                                if gitignore_spec.match_file(path_to_check_vs_spec):
-                                    git_ignored_count += 1
-                                    continue 
-                            except: pass 
-                        
-                        content, read_success = self.read_file_content(file_full_path)
-                        if read_success:
-                            if collected_file_contents: collected_file_contents.append("\n\n")
-                            relative_path = os.path.relpath(file_full_path, item_path)
-                            collected_file_contents.append(f"--- Content from (folder {os.path.basename(item_path)}): {relative_path} ---\n")
-                            collected_file_contents.append(content)
-                            files_processed_count += 1
-                        else:
-                            files_skipped_count += 1
-        
-        raw_files_combined_text = "".join(collected_file_contents)
+        from clipboardconcat import PATHSPEC_AVAILABLE
+        if not PATHSPEC_AVAILABLE and not self.pathspec_warning_shown and any(os.path.isdir(p) for p in paths):
+            logger.warning("'pathspec' not installed. .gitignore files won't be processed. `pip install pathspec`")
+            self.pathspec_warning_shown = True
+
+        # Read now: the instructions in effect are the ones present at drop time.
         current_instructions = self.instructions_text_widget.get("1.0", tk.END).strip()
-        
-        if raw_files_combined_text.strip() or current_instructions.strip():
-            self.final_text_to_copy = raw_files_combined_text
-            if current_instructions:
-                if self.final_text_to_copy.strip():
-                    self.final_text_to_copy += "\n\n--- Appended Instructions ---\n"
-                else: 
-                    self.final_text_to_copy = "--- Instructions ---\n"
-                self.final_text_to_copy += current_instructions
-        else:
-            self.final_text_to_copy = ""
+        self.start_collection(paths, current_instructions)
+
+    def discard_result(self):
+        # A new drop replaces whatever is still being collected, copied or watched.
+        self.stop_watching()
+        self.cancel_clipboard_copy()
+        self.cancel_current_job()
+        self.set_output(None)
+        self.update_action_buttons_state()
 
+    def start_collection(self, paths, instructions):
+        self.discard_result()
+        self.last_drop = (paths, instructions)
+        try:
+            max_tokens = self.read_token_budget()
+        except ValueError:
+            self.status_label.config(text="Token budget must be a positive whole number (or empty for no limit).")
+            return
+        job = CollectionJob(
+            paths, instructions, read_workers=self.read_workers, file_filter=self.file_filter, cache=self.cache,
+            watch=self.watch_var.get(), dedup=self.dedup_var.get(),
+            max_tokens=max_tokens, truncate_last=self.truncate_var.get(),
+        )
+        self.current_job = job
+        self.status_label.config(text="Processing...")
+        self.btn_cancel.config(state=NORMAL)
+        threading.Thread(target=job.run, daemon=True).start()
+        self.root.after(PROGRESS_POLL_MS, self.poll_collection_job, job)
+
+    def on_cancel(self):
+        if self.cancel_current_job():
+            self.status_label.config(text="Processing cancelled.")
+
+    def cancel_current_job(self):
+        """Signals the running collection job (if any) to stop. Returns True if one was running."""
+        job, self.current_job = self.current_job, None
+        self.btn_cancel.config(state=DISABLED)
+        if job is None:
+            return False
+        if job.done:
+            job.output.close()  # Finished but never picked up by poll_collection_job.
+            return False
+        job.cancel_event.set()
+        return True
+
+    def poll_collection_job(self, job):
+        if job is not self.current_job:
+            return  # Cancelled or replaced by a newer drop; its results are discarded.
+        if not job.done:
+            self.status_label.config(
+                text=f"Processing... {job.stats.files_scanned} file(s) scanned, {job.stats.files_processed_count} read, "
+                     f"{job.stats.bytes_read / 1024:.0f} KB so far (about {job.stats.output_tokens} tokens)."
+            )
+            self.root.after(PROGRESS_POLL_MS, self.poll_collection_job, job)
+            return
+        self.current_job = None
+        self.btn_cancel.config(state=DISABLED)
+        if job.error is not None:
+            self.status_label.config(text=f"An unexpected error occurred while processing: {job.error}")
+            return
+        self.finish_collection(job)
+
+    def on_watch_toggled(self):
+        if not self.watch_var.get():
+            if self.stop_watching():
+                self.status_label.config(text=self.result_status(self.output.current_stats))
+            return
+        if self.last_drop is not None and self.current_job is None:
+            # The last result is a frozen snapshot; collect it again in watch mode.
+            self.start_collection(*self.last_drop)
+
+    def on_dedup_toggled(self):
+        if self.last_drop is not None and self.current_job is None:
+            # Collect the last drop again with the new setting (unchanged files come from the cache).
+            self.start_collection(*self.last_drop)
+
+    def on_budget_changed(self, event=None):
+        if self.last_drop is not None and self.current_job is None:
+            self.start_collection(*self.last_drop)
+
+    def read_token_budget(self):
+        """The token budget typed in, or None when empty. Raises ValueError unless it is a positive whole number."""
+        text = self.budget_entry.get().strip().replace(",", "")
+        if not text:
+            return None
+        max_tokens = int(text)
+        if max_tokens <= 0:
+            raise ValueError(f"token budget must be positive: {max_tokens}")
+        return max_tokens
+
+    def start_watching(self, model):
+        from clipboardconcat import WatchSession
+
+        session = WatchSession(model)
+        self.watch_session = session
+        session.start()
+        self.root.after(WATCH_REFRESH_MS, self.poll_watch_session, session, model.version)
+
+    def stop_watching(self):
+        """Stops watch mode. The current result stays available as a snapshot. Returns True if it was on."""
+        session, self.watch_session = self.watch_session, None
+        if session is None:
+            return False
+        session.stop()
+        return True
+
+    def poll_watch_session(self, session, seen_version):
+        if session is not self.watch_session:
+            return  # Stopped or replaced by a newer drop.
+        model = session.model
+        if model.version != seen_version or session.error is not None:
+            seen_version = model.version
+            self.output_stats = model.current_stats
+            self.status_label.config(text=self.result_status(model.current_stats))
+            self.update_action_buttons_state()
+        if session.error is not None:
+            # Reported once; the result stays available as a snapshot.
+            self.watch_session = None
+            self.watch_var.set(False)
+            return
+        self.root.after(WATCH_REFRESH_MS, self.poll_watch_session, session, seen_version)
+
+    def settings_changed_since(self, job):
+        """Whether an option that shapes the result was changed while `job` was collecting."""
+        if (self.watch_var.get() and not job.watch) or job.dedup != self.dedup_var.get():
+            return True
+        try:
+            max_tokens = self.read_token_budget()
+        except ValueError:  # Reported when it is used; keep the result collected with the last valid budget.
+            max_tokens = job.max_tokens
+        return max_tokens != job.max_tokens or self.truncate_var.get() != job.truncate_last
+
+    def finish_collection(self, job):
+        if self.settings_changed_since(job):
+            # The toggle handlers leave a running job alone; collect the drop again with the current options.
+            job.output.close()
+            self.start_collection(*self.last_drop)
+            return
+        self.set_output(job.output)
+        self.output_trace = job.trace
+        self.output_stats = job.stats
+        self.output_max_tokens = job.max_tokens
+        self.drop_count += 1
+        if self.trace_dir:
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(job.trace.started_at))
+            self.output_trace_path = os.path.join(self.trace_dir, f"ClipboardConcat_trace_{stamp}_{self.drop_count}.json")
+            self.write_trace()
+        for file_path in job.stats.budget_left_out:
+            logger.debug("Left out by the token budget: %s", file_path)
+        for seconds, file_path, size in job.trace.slowest_files:
+            logger.debug("Slow file: %.1f ms, %d bytes: %s", seconds * 1000, size, file_path)
+        if job.watch and self.watch_var.get():  # Unticked meanwhile: keep the result as a snapshot.
+            self.start_watching(job.output)
+        self.status_label.config(text=self.result_status(job.stats))
+        self.update_action_buttons_state()
+
+    def result_status(self, stats):
+        """Status text describing the current result."""
+        from clipboardconcat import format_budget_status, format_skip_counts
+
+        files_processed_count = stats.files_processed_count
+        files_skipped_count = stats.files_skipped_count
+        git_ignored_count = stats.git_ignored_count
+        git_ignored_dir_count = stats.git_ignored_dir_count
         status_lines = []
-        if self.final_text_to_copy.strip():
-            char_count = len(self.final_text_to_copy)
-            line_count = len(self.final_text_to_copy.splitlines())
+        if self.has_output():
+            char_count = stats.output_chars
+            line_count = stats.output_lines
             # Corrected status message text regarding button position
             status_lines.append("Processing complete. Choose an action from the buttons above.") 
-            status_lines.append(f"{files_processed_count} file(s) processed, {files_skipped_count} unreadable/binary.")
-            if git_ignored_count > 0:
-                status_lines.append(f"{git_ignored_count} file(s) skipped by .gitignore rules.")
-            status_lines.append(f"Total lines: {line_count}, Total characters: {char_count} (incl. instructions).")
+            status_lines.append(f"{files_processed_count} file(s) processed, {files_skipped_count} skipped{format_skip_counts(stats.skip_counts)}.")
+            if git_ignored_count > 0 or git_ignored_dir_count > 0:
+                status_lines.append(f"{git_ignored_count} file(s) and {git_ignored_dir_count} folder(s) skipped by .gitignore rules.")
+            if self.cache is not None:
+                status_lines.append(f"Cache: {stats.cache_hits} hit(s), {stats.cache_misses} miss(es).")
+            if stats.duplicate_count:
+                status_lines.append(
+                    f"Duplicates: {stats.duplicate_count} file(s) replaced by a reference, "
+                    f"{stats.duplicate_bytes_saved / 1024:.0f} KB saved."
+                )
+            status_lines.append(
+                f"Total lines: {line_count}, Total characters: {char_count}, about {stats.output_tokens} tokens "
+                f"(incl. instructions)."
+            )
+            if stats.budget_reached:
+                status_lines.append(format_budget_status(stats, self.output_max_tokens))
+            if self.output_trace is not None and self.output_trace.summary():
+                status_lines.append(self.output_trace.summary())
+            status_lines.extend(self.watch_status_lines())
         else:
             status_lines.append("No text content processed.")
-            if files_processed_count == 0 and (files_skipped_count > 0 or git_ignored_count > 0):
-                 status_lines.append(f"Files: 0 read, {files_skipped_count} unreadable, {git_ignored_count} .gitignored.")
-
-        self.status_label.config(text="\n".join(status_lines))
-        self.update_action_buttons_state()
+            if files_processed_count == 0 and (files_skipped_count > 0 or git_ignored_count > 0 or git_ignored_dir_count > 0):
+                 status_lines.append(f"Files: 0 read, {files_skipped_count} skipped{format_skip_counts(stats.skip_counts)}, {git_ignored_count} .gitignored ({git_ignored_dir_count} folder(s) pruned).")
+            if stats.budget_reached:
+                status_lines.append(format_budget_status(stats, self.output_max_tokens))
+            status_lines.extend(self.watch_status_lines())
+        return "\n".join(status_lines)
+
+    def watch_status_lines(self):
+        session = self.watch_session
+        if session is None:
+            return []
+        if session.error is not None:
+            return [f"Watching stopped: {session.error}"]
+        model = session.model
+        backend = f" ({session.backend_name})" if session.backend_name else ""
+        if model.last_update_time is None:
+            return [f"Watching for changes{backend}."]
+        return [
+            f"Watching for changes{backend}. Last update at {time.strftime('%H:%M:%S', time.localtime(model.last_update_time))}: "
+            f"{model.last_update_reread} file(s) re-read in {model.last_update_seconds * 1000:.1f} ms."
+        ]
 
     def parse_paths(self, paths_string):
-        paths_string = paths_string.strip()
-        if paths_string.startswith('{') and paths_string.endswith('}'):
-            paths_string = paths_string[1:-1]
-        paths = []
-        if '{' in paths_string and '}' in paths_string:
-            import re
-            matches = re.findall(r'\{([^{}]*?)\}|([^\s]+)', paths_string)
-            for match_tuple in matches:
-                path = match_tuple[0] if match_tuple[0] else match_tuple[1]
-                if path: paths.append(path.strip())
-        elif ' ' in paths_string and not os.path.exists(paths_string): # Paths with spaces, not quoted
-            # This heuristic attempts to reconstruct paths that may contain spaces
-            # It's not foolproof for all edge cases but handles some common scenarios
-            parts = paths_string.split(' ')
-            current_path_candidate = ""
-            temp_paths_list = []
-            for part in parts:
-                if current_path_candidate:
-                    test_path = current_path_candidate + " " + part
-                else:
-                    test_path = part
-                
-                # Check if the combined path exists OR if the original part was a path itself (if we are starting fresh)
-                if os.path.exists(test_path):
-                    temp_paths_list.append(test_path)
-                    current_path_candidate = ""
-                elif not current_path_candidate and os.path.exists(part): # current part is a path, and no candidate forming
-                     temp_paths_list.append(part)
-                     current_path_candidate = ""
-                else: # Doesn't exist yet, keep building candidate
-                    if current_path_candidate:
-                        current_path_candidate += " " + part
-                    else:
-                        current_path_candidate = part
-            if current_path_candidate and os.path.exists(current_path_candidate): # Add last candidate if valid
-                 temp_paths_list.append(current_path_candidate)
-            
-            if temp_paths_list: # If heuristic found paths
-                paths.extend(temp_paths_list)
-            elif os.path.exists(paths_string): # Fallback: original string is a single path
-                paths.append(paths_string)
-        else: # Single path or paths separated by null characters (less common from explorer)
-            if os.path.exists(paths_string): 
-                paths.append(paths_string)
-            else: # Check for null character separation
-                potential_paths = paths_string.split('\0')
-                for p_path in potential_paths:
-                    if p_path.strip() and os.path.exists(p_path.strip()):
-                        paths.append(p_path.strip())
-        
-        abs_paths = []
-        for p in paths:
-            # Ensure all paths are absolute; TkinterDnD usually provides absolute paths for DND_FILES
-            # but this makes it robust.
-            normalized_p = os.path.normpath(p.strip()) # Strip whitespace just in case
-            if os.path.isabs(normalized_p):
-                abs_paths.append(normalized_p)
-            else:
-                # This case is unlikely for file drops but good for robustness
-                abs_paths.append(os.path.abspath(normalized_p))
-        return abs_paths
-
-
-    def read_file_content(self, file_path):
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='strict') as f:
-                return f.read(), True
-        except UnicodeDecodeError: return None, False
-        except IOError: return None, False 
-        except Exception: return None, False
-
-    def save_to_file(self, content_to_save, filename_suggestion="CollectedText.txt"):
-        if not (hasattr(self, 'final_text_to_copy') and self.final_text_to_copy and self.final_text_to_copy.strip()): # Check instance var
+        """Absolute paths of the existing dropped items, each once and none inside another (see clipboardconcat.drop)."""
+        from clipboardconcat.drop import parse_drop_data, resolve_drop_paths
+
+        paths, redundant = resolve_drop_paths(parse_drop_data(paths_string, self.root.tk.splitlist))
+        if redundant:
+            logger.info("Skipped %d dropped item(s) listed twice or inside a dropped folder", redundant)
+        return paths
+
+    def save_to_file(self, output, filename_suggestion="CollectedText.txt"):
+        if output is None or not output.char_count:
             self.status_label.config(text="No content to save.")
             from tkinter import messagebox 
             messagebox.showwarning("No Content", "There is no content to save.")
@@ -388,14 +652,10 @@ class TextCollectorApp:
                 title="Save collected text as...", initialfile=filename_suggestion
             )
             if filepath:
-                with open(filepath, 'w', encoding='utf-8') as f: f.write(content_to_save) # Use passed content_to_save
-                status_summary = f"Result saved to {os.path.basename(filepath)}"
-                current_status_lines = self.status_label.cget("text").splitlines()
-                detail_lines = [line for line in current_status_lines if "file(s) processed" in line or "Total lines" in line or "skipped by .gitignore" in line]
-                if detail_lines:
-                    self.status_label.config(text=status_summary + "\n" + "\n".join(detail_lines))
-                else:
-                    self.status_label.config(text=status_summary)
+                with self.output_trace.timed("save"):
+                    output.save_to(filepath)
+                self.write_trace()
+                self.show_action_result(f"Result saved to {os.path.basename(filepath)}")
                 messagebox.showinfo("Saved", f"Content saved to {os.path.basename(filepath)}")
             else: 
                  current_status_lines = self.status_label.cget("text").splitlines()
@@ -408,6 +668,11 @@ class TextCollectorApp:
             messagebox.showerror("Save Error", f"Failed to save file: {e}")
 
 if __name__ == '__main__':
-    root = TkinterDnD.Tk() 
-    app = TextCollectorApp(root)
+    # CLIPBOARDCONCAT_LOG_LEVEL=DEBUG also logs the slowest files of every drop;
+    # CLIPBOARDCONCAT_TRACE_DIR=/some/dir writes a JSON trace per drop there.
+    logging.basicConfig(
+        level=os.environ.get("CLIPBOARDCONCAT_LOG_LEVEL", "INFO").upper(), format="%(levelname)s: %(message)s"
+    )
+    root = TkinterDnD.Tk()
+    app = TextCollectorApp(root, trace_dir=os.environ.get("CLIPBOARDCONCAT_TRACE_DIR"))
     root.mainloop()
\ No newline at end of file
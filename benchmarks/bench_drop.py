@@ -0,0 +1,143 @@
+"""
+Benchmark for parsing huge drops (the payload tkinterdnd2 hands to on_drop).
+
+Creates --items files (20,000 by default) with spaces in their names, spread
+over --dirs directories, and times turning payloads naming all of them into
+the list of paths to collect:
+
+    braced      the Tcl list tkinterdnd2 produces: `{/tmp/x/file 1.txt} ...`
+    escaped     the same items with backslash-escaped spaces
+    unescaped   paths joined by plain spaces (the fallback heuristic)
+    overlap     every directory plus every file inside it, and each item
+                twice; all files must be recognised as redundant
+
+Each payload is split with the pure-Python `split_tcl_list` and, when Tcl is
+available (no display needed), with Tcl's own splitlist as the app does, then
+resolved with `resolve_drop_paths`. The number of stat-like system calls is
+reported too, to show the batching: it grows with the number of directories,
+not the number of items.
+
+    python benchmarks/bench_drop.py
+    python benchmarks/bench_drop.py --items 100000 --dirs 50 --json drop.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clipboardconcat.drop import parse_drop_data, resolve_drop_paths, split_tcl_list  # noqa: E402
+
+try:
+    import tkinter
+except ImportError:  # Python built without Tcl/Tk
+    tkinter = None
+
+# os functions that hit the file system while resolving a drop.
+COUNTED_CALLS = ("stat", "lstat", "scandir")
+
+
+class SyscallCounter:
+    """Counts calls to COUNTED_CALLS (os.path.exists/isdir go through os.stat) while active."""
+
+    def __init__(self):
+        self.count = 0
+        self._originals = {}
+
+    def __enter__(self):
+        for name in COUNTED_CALLS:
+            original = self._originals[name] = getattr(os, name)
+            setattr(os, name, self._counting(original))
+        return self
+
+    def __exit__(self, *exc_info):
+        for name, original in self._originals.items():
+            setattr(os, name, original)
+
+    def _counting(self, original):
+        def counted(*args, **kwargs):
+            self.count += 1
+            return original(*args, **kwargs)
+        return counted
+
+
+def build_files(root, items, dirs):
+    dir_paths = [os.path.join(root, f"folder {d}") for d in range(dirs)]
+    for dir_path in dir_paths:
+        os.mkdir(dir_path)
+    files = []
+    for i in range(items):
+        path = os.path.join(dir_paths[i % dirs], f"report {i} final copy.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("x\n")
+        files.append(path)
+    return dir_paths, files
+
+
+def payloads(dir_paths, files):
+    def braced(paths):
+        return " ".join("{" + p + "}" if " " in p else p for p in paths)
+
+    return dict(
+        braced=(braced(files), len(files)),
+        escaped=(" ".join(p.replace(" ", "\\ ") for p in files), len(files)),
+        unescaped=(" ".join(files), len(files)),
+        overlap=(braced(dir_paths + files + dir_paths + files), len(dir_paths)),
+    )
+
+
+def time_one(data, splitlist, expected, repeat):
+    best = None
+    for _ in range(repeat):
+        with SyscallCounter() as counter:
+            start = time.perf_counter()
+            items = parse_drop_data(data, splitlist)
+            parsed = time.perf_counter()
+            paths, redundant = resolve_drop_paths(items)
+            end = time.perf_counter()
+        if len(paths) != expected:
+            raise RuntimeError(f"expected {expected} paths, got {len(paths)}")
+        result = dict(parse_seconds=parsed - start, resolve_seconds=end - parsed, total_seconds=end - start,
+                      items=len(items), paths=len(paths), redundant=redundant, syscalls=counter.count)
+        if best is None or result["total_seconds"] < best["total_seconds"]:
+            best = result
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=20000, help="number of dropped files")
+    parser.add_argument("--dirs", type=int, default=20, help="directories the files are spread over")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement; the best is kept")
+    parser.add_argument("--json", metavar="FILE", help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    splitters = {"python": split_tcl_list}
+    if tkinter is not None:
+        splitters["tcl"] = tkinter.Tcl().splitlist
+
+    results = dict(items=args.items, dirs=args.dirs, repeat=args.repeat, payloads={})
+    with tempfile.TemporaryDirectory(prefix="ClipboardConcat_drop_") as root:
+        dir_paths, files = build_files(root, args.items, args.dirs)
+        for name, (data, expected) in payloads(dir_paths, files).items():
+            results["payloads"][name] = {"bytes": len(data)}
+            for splitter_name, splitlist in splitters.items():
+                result = time_one(data, splitlist, expected, args.repeat)
+                results["payloads"][name][splitter_name] = result
+                print(f"{name:<10} {splitter_name:<6} parse {result['parse_seconds'] * 1000:8.1f} ms  "
+                      f"resolve {result['resolve_seconds'] * 1000:8.1f} ms  "
+                      f"{result['items']} items -> {result['paths']} paths ({result['redundant']} redundant), "
+                      f"{result['syscalls']} stat/scandir calls")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
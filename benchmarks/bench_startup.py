@@ -0,0 +1,151 @@
+"""
+Cold startup benchmark with a regression budget.
+
+Each target is imported in a fresh interpreter under `python -X importtime`
+and the cumulative import time of its top-level module is read from the
+report; the median of --runs runs is compared against the budget:
+
+    app              the desktop app module (everything before the window)
+    clipboardconcat  the package itself (names load lazily on first access)
+
+It also checks that the modules deferred until after the window is shown
+(the core, the content cache, pathspec, pyperclip, ...) are not imported by
+`import app`. With a display available, --window additionally measures the
+time from interpreter start to the main window being mapped.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --budget-ms 80 --runs 15 --window
+
+Exits with status 1 when a budget is exceeded, a target fails to import or a
+deferred module leaks into the startup path, so it can run as a CI check.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Median cumulative import time budgets in milliseconds. Generous on purpose:
+# they catch an eager import of something heavy, not machine-to-machine noise.
+STARTUP_BUDGET_MS = {
+    "app": 50.0,
+    "clipboardconcat": 10.0,
+}
+
+# Imported only after the window is shown (see app.TextCollectorApp.finish_startup).
+DEFERRED_MODULES = (
+    "clipboardconcat.core", "clipboardconcat.cache", "clipboardconcat.watch", "concurrent.futures",
+    "ctypes", "pathspec", "pyperclip", "sqlite3", "subprocess", "tempfile",
+)
+
+_LOADED_MODULES_SNIPPET = "import sys, json; import {module}; print(json.dumps(sorted(sys.modules)))"
+
+_WINDOW_SNIPPET = """\
+import time
+start = time.perf_counter()
+from tkinterdnd2 import TkinterDnD
+import app
+root = TkinterDnD.Tk()
+app.TextCollectorApp(root, use_cache=False)
+def mapped(event):
+    if event.widget is root:
+        print(time.perf_counter() - start)
+        root.after_idle(root.destroy)
+root.bind("<Map>", mapped, add="+")
+root.mainloop()
+"""
+
+
+def _run_python(args):
+    return subprocess.run(
+        [sys.executable, *args], capture_output=True, text=True, check=True, cwd=REPO_ROOT,
+        env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1"),
+    )
+
+
+def _failure(error, lines=5):
+    """The last `lines` lines of a failed run's stderr (usually the traceback's end)."""
+    tail = (error.stderr or "").strip().splitlines()[-lines:]
+    return "\n".join(tail) or f"exit status {error.returncode}"
+
+
+def import_time_ms(module):
+    """Cumulative import time of `module` in a fresh interpreter, from the -X importtime report."""
+    report = _run_python(["-X", "importtime", "-c", f"import {module}"]).stderr
+    for line in report.splitlines():
+        # "import time:   self [us] | cumulative | imported package"
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1]) / 1000
+    raise RuntimeError(f"no -X importtime entry for {module}:\n{report}")
+
+
+def loaded_modules(module):
+    return set(json.loads(_run_python(["-c", _LOADED_MODULES_SNIPPET.format(module=module)]).stdout))
+
+
+def window_time_ms():
+    """Interpreter start to main window mapped, or None without a usable display."""
+    try:
+        return float(_run_python(["-c", _WINDOW_SNIPPET]).stdout) * 1000
+    except (subprocess.CalledProcessError, ValueError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=9, help="fresh interpreters per target; the median is kept")
+    parser.add_argument("--budget-ms", type=float,
+                        help=f"budget for `import app` (default: {STARTUP_BUDGET_MS['app']:g})")
+    parser.add_argument("--window", action="store_true", help="also time the window appearing (needs a display)")
+    parser.add_argument("--json", metavar="FILE", help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    budgets = dict(STARTUP_BUDGET_MS)
+    if args.budget_ms is not None:
+        budgets["app"] = args.budget_ms
+
+    results = dict(python=sys.version.split()[0], runs=args.runs, targets={})
+    failed = False
+    for module, budget in budgets.items():
+        try:
+            times = [import_time_ms(module) for _ in range(args.runs)]
+        except subprocess.CalledProcessError as e:
+            failed = True
+            results["targets"][module] = dict(error=_failure(e), budget_ms=budget)
+            print(f"import {module} failed: {_failure(e)}")
+            continue
+        median = statistics.median(times)
+        over = median > budget
+        failed |= over
+        results["targets"][module] = dict(median_ms=median, min_ms=min(times), max_ms=max(times), budget_ms=budget)
+        print(f"import {module:<16} {median:7.1f} ms median ({min(times):.1f}-{max(times):.1f}), "
+              f"budget {budget:g} ms{'  OVER BUDGET' if over else ''}")
+
+    try:
+        leaked = sorted(set(DEFERRED_MODULES) & loaded_modules("app"))
+    except subprocess.CalledProcessError:  # Already reported with the import times.
+        leaked = []
+        failed = True
+    results["deferred_modules_loaded"] = leaked
+    if leaked:
+        failed = True
+        print(f"deferred modules imported at startup: {', '.join(leaked)}")
+
+    if args.window:
+        window = window_time_ms()
+        results["window_ms"] = window
+        print(f"window mapped     {window:7.1f} ms" if window is not None else "window mapped     skipped (no display)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+"""
+Per-phase benchmark suite for the concatenation core.
+
+For each scenario (see synthetic_tree.SCENARIOS) a synthetic tree is built in
+a temporary directory and collected several times. The pipeline is split into
+the phases below, each timed on its own with the same building blocks the
+core uses (GitignoreRules, FileFilter, assemble_chunks, ConcatStats):
+
+    ignore  loading and compiling .gitignore files (served from the in-memory
+            spec cache after the first run; `ignore_cold` is the first run)
+    walk    os.walk itself (directory listing)
+    match   checking names against the .gitignore rules
+    read    classifying, reading and decoding the kept files (serial)
+    join    assembling headers, separators and instructions into one string
+    stats   counting output lines and characters
+
+The optional deduplication stage is timed on its own (`dedup`: hashing every
+kept file and looking the digests up, serially), along with the duplicates it
+finds and the bytes it saves; the "duplicates" scenario has plenty of them.
+So is a parallel run with a token budget of BUDGET_FRACTION of the full
+output (`budget`), with the bytes it read: reading stops once the budget is
+used up, so it should cost about that fraction of the full run.
+
+The end-to-end `concat_paths` time is measured too, serial and with the
+thread pool, and its output is checked against the phase-by-phase result.
+Throughput is reported in files/s and MB/s, peak memory as the tracemalloc
+peak of one extra end-to-end run plus the process's max RSS.
+
+Results can be written as JSON and compared with an earlier run:
+
+    python benchmarks/bench_suite.py --json before.json
+    git checkout my-branch
+    python benchmarks/bench_suite.py --json after.json --compare before.json
+
+Never imports Tkinter, so it runs headless (CI, SSH sessions, containers).
+Timings are warm page cache numbers; the best of --repeat runs is kept.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from clipboardconcat import (  # noqa: E402
+    DEFAULT_READ_WORKERS, PATHSPEC_AVAILABLE, ConcatStats, FileFilter, GitignoreRules, concat_paths,
+)
+from clipboardconcat.core import DuplicateFilter, assemble_chunks, folder_file_header  # noqa: E402
+from clipboardconcat.ignore import clear_spec_cache  # noqa: E402
+from synthetic_tree import SCENARIOS, add_arguments, build_tree, params_from_args  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PHASES = ("ignore", "walk", "match", "read", "join", "stats")
+INSTRUCTIONS = "Benchmark instructions.\n"
+BUDGET_FRACTION = 0.1
+
+
+def run_phases(root, file_filter):
+    """One collection of `root`, timed phase by phase. Returns (timings, output text, ConcatStats, pieces)."""
+    timings = dict.fromkeys(PHASES, 0.0)
+    clock = time.perf_counter
+    stats = ConcatStats()
+    rules = GitignoreRules(root) if PATHSPEC_AVAILABLE else None
+
+    files = []
+    walk_start = clock()
+    for current_root, dirs, filenames in os.walk(root, topdown=True):
+        if '.git' in dirs: dirs.remove('.git')
+        start = clock()
+        rel_root = rules.enter_dir(current_root, filenames) if rules else None
+        timings["ignore"] += clock() - start
+        start = clock()
+        if rules:
+            kept_dirs = []
+            for dirname in dirs:
+                if rules.is_ignored(rel_root, dirname, is_dir=True):
+                    stats.git_ignored_dir_count += 1
+                else:
+                    kept_dirs.append(dirname)
+            dirs[:] = kept_dirs
+        for filename in filenames:
+            stats.files_scanned += 1
+            if rules and rules.is_ignored(rel_root, filename):
+                stats.git_ignored_count += 1
+            else:
+                files.append(os.path.join(current_root, filename))
+        timings["match"] += clock() - start
+    timings["walk"] = clock() - walk_start - timings["ignore"] - timings["match"]
+
+    start = clock()
+    pieces = []
+    for file_path in files:
+        content, skip_reason, size = file_filter.read(file_path)
+        if skip_reason is None:
+            stats.files_processed_count += 1
+            stats.bytes_read += size
+            pieces.append((folder_file_header(root, file_path), content))
+        else:
+            stats.skip_counts[skip_reason] = stats.skip_counts.get(skip_reason, 0) + 1
+    timings["read"] = clock() - start
+
+    start = clock()
+    chunks = list(assemble_chunks(pieces, INSTRUCTIONS))
+    text = "".join(chunks)
+    timings["join"] = clock() - start
+
+    start = clock()
+    for chunk in chunks:
+        stats.count_output(chunk)
+    timings["stats"] = clock() - start
+    return timings, text, stats, pieces
+
+
+def time_dedup(pieces):
+    """Seconds to deduplicate the (header, content) pairs of one collection, and the ConcatStats it filled in."""
+    stats = ConcatStats()
+    duplicates = DuplicateFilter(stats)
+    start = time.perf_counter()
+    for header, content in pieces:
+        duplicates.check(header, content)
+    return time.perf_counter() - start, stats
+
+
+def time_end_to_end(root, read_workers, file_filter, max_tokens=None):
+    start = time.perf_counter()
+    text, stats = concat_paths([root], INSTRUCTIONS, read_workers=read_workers, file_filter=file_filter,
+                               max_tokens=max_tokens)
+    return time.perf_counter() - start, text, stats
+
+
+def peak_traced_bytes(root, read_workers, file_filter):
+    tracemalloc.start()
+    try:
+        concat_paths([root], INSTRUCTIONS, read_workers=read_workers, file_filter=file_filter)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def max_rss_bytes():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024  # bytes on macOS, KiB elsewhere
+
+
+def throughput(files, size, seconds):
+    if not seconds:
+        return dict(seconds=seconds, files_per_s=None, mb_per_s=None)
+    return dict(seconds=seconds, files_per_s=files / seconds, mb_per_s=size / 1e6 / seconds)
+
+
+def run_scenario(name, params, repeat, read_workers):
+    file_filter = FileFilter()
+    with tempfile.TemporaryDirectory(prefix="ClipboardConcat_bench_") as root:
+        start = time.perf_counter()
+        manifest = build_tree(root, **params)
+        build_seconds = time.perf_counter() - start
+
+        clear_spec_cache()
+        ignore_cold = run_phases(root, file_filter)[0]["ignore"]
+        best = None
+        for _ in range(repeat):
+            timings, phase_text, stats, pieces = run_phases(root, file_filter)
+            best = timings if best is None else {k: min(best[k], timings[k]) for k in PHASES}
+        dedup_seconds, dedup_stats = min((time_dedup(pieces) for _ in range(repeat)), key=lambda result: result[0])
+        del pieces
+        serial = min(time_end_to_end(root, 1, file_filter) for _ in range(repeat))
+        parallel = min(time_end_to_end(root, read_workers, file_filter) for _ in range(repeat))
+        if not (phase_text == serial[1] == parallel[1]):
+            raise RuntimeError(f"{name}: phase-by-phase output differs from concat_paths output")
+        max_tokens = max(1, int(stats.output_tokens * BUDGET_FRACTION))
+        budget = min((time_end_to_end(root, read_workers, file_filter, max_tokens) for _ in range(repeat)),
+                     key=lambda result: result[0])
+        if budget[2].output_tokens > max_tokens:
+            raise RuntimeError(f"{name}: output of {budget[2].output_tokens} tokens exceeds the budget of {max_tokens}")
+        peak = peak_traced_bytes(root, read_workers, file_filter)
+
+    files, size = stats.files_processed_count, stats.bytes_read
+    return dict(
+        params=manifest["params"],
+        tree=dict((k, v) for k, v in manifest.items() if k != "params"),
+        build_seconds=build_seconds,
+        counts=dict(
+            files_scanned=stats.files_scanned, files_read=files, files_skipped=stats.files_skipped_count,
+            skip_counts=stats.skip_counts, git_ignored_files=stats.git_ignored_count,
+            git_ignored_dirs=stats.git_ignored_dir_count, bytes_read=size, output_chars=stats.output_chars,
+        ),
+        phases={phase: best[phase] for phase in PHASES},
+        ignore_cold=ignore_cold,
+        dedup=dict(seconds=dedup_seconds, duplicate_files=dedup_stats.duplicate_count,
+                   bytes_saved=dedup_stats.duplicate_bytes_saved),
+        budget=dict(seconds=budget[0], max_tokens=max_tokens, output_tokens=budget[2].output_tokens,
+                    bytes_read=budget[2].bytes_read, files_left_out=len(budget[2].budget_left_out)),
+        phases_total=sum(best.values()),
+        read=throughput(files, size, best["read"]),
+        end_to_end=dict(
+            serial=throughput(files, size, serial[0]),
+            parallel=dict(throughput(files, size, parallel[0]), read_workers=read_workers),
+        ),
+        peak_traced_bytes=peak,
+    )
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results, baseline=None):
+    for name, result in results["scenarios"].items():
+        counts = result["counts"]
+        print(f"\n== {name}: {counts['files_scanned']} scanned, {counts['files_read']} read, "
+              f"{counts['bytes_read'] / 1e6:.1f} MB, {counts['git_ignored_files']} files / "
+              f"{counts['git_ignored_dirs']} dirs ignored")
+        base = (baseline or {}).get("scenarios", {}).get(name)
+        rows = [(phase, result["phases"][phase], base and base["phases"].get(phase)) for phase in PHASES]
+        rows.append(("total", result["phases_total"], base and base["phases_total"]))
+        rows.append(("ignore cold", result["ignore_cold"], base and base.get("ignore_cold")))
+        rows.append(("dedup", result["dedup"]["seconds"], base and base.get("dedup", {}).get("seconds")))
+        for mode in ("serial", "parallel"):
+            rows.append((f"e2e {mode}", result["end_to_end"][mode]["seconds"],
+                         base and base["end_to_end"][mode]["seconds"]))
+        rows.append(("e2e budget", result["budget"]["seconds"], base and base.get("budget", {}).get("seconds")))
+        for label, seconds, base_seconds in rows:
+            line = f"  {label:<13} {seconds * 1000:9.1f} ms"
+            if base_seconds:
+                line += f"   {base_seconds * 1000:9.1f} ms before  x{base_seconds / seconds:.2f}"
+            print(line)
+        parallel = result["end_to_end"]["parallel"]
+        if parallel["files_per_s"]:
+            print(f"  throughput    {parallel['files_per_s']:9.0f} files/s  {parallel['mb_per_s']:.1f} MB/s "
+                  f"(parallel end to end)")
+        dedup = result["dedup"]
+        print(f"  duplicates    {dedup['duplicate_files']:9d} files, {dedup['bytes_saved'] / 1e6:.1f} MB saved by --dedup")
+        budget = result["budget"]
+        print(f"  budget        {budget['max_tokens']:9d} tokens, {budget['bytes_read'] / 1e6:.1f} MB read, "
+              f"{budget['files_left_out']} files left out")
+        print(f"  peak memory   {result['peak_traced_bytes'] / 1e6:9.1f} MB traced")
+    if results["max_rss_bytes"]:
+        print(f"\nprocess max RSS: {results['max_rss_bytes'] / 1e6:.1f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scenario to run (repeatable; default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement; the best is kept")
+    parser.add_argument("--workers", type=int, default=DEFAULT_READ_WORKERS, help="read_workers for the parallel run")
+    parser.add_argument("--json", metavar="FILE", help="write the results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="JSON results of an earlier run to compare against")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    scenarios = args.scenario or list(SCENARIOS)
+    results = dict(
+        commit=git_commit(),
+        timestamp=datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        python=platform.python_version(),
+        platform=platform.platform(),
+        cpu_count=os.cpu_count(),
+        pathspec=PATHSPEC_AVAILABLE,
+        repeat=args.repeat,
+        scenarios={},
+    )
+    for name in scenarios:
+        print(f"running {name}...", file=sys.stderr)
+        results["scenarios"][name] = run_scenario(name, params_from_args(args, name), args.repeat, args.workers)
+    results["max_rss_bytes"] = max_rss_bytes()
+
+    print_report(results, baseline)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
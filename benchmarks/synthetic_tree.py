@@ -0,0 +1,191 @@
+"""
+Deterministic synthetic source trees for the benchmarks.
+
+A tree is fully described by its parameters (and seed), so two runs on
+different commits walk byte-identical input:
+
+* `files` text files spread over directories nested up to `depth` levels,
+  `fanout` subdirectories per level;
+* a `binary_ratio` share of binary files (PNG signatures and NUL-laden blobs)
+  mixed in with the text;
+* a `.gitignore` in roughly every `gitignore_every`-th directory, with
+  negations (`!keep_*.log`), anchored patterns and directory-only rules, plus
+  files that those rules actually match;
+* `vendored_files` files under `node_modules/` and `vendor/`, ignored by the
+  root `.gitignore` (the "huge vendored directory" case);
+* a `duplicate_ratio` share of text files that are byte-identical copies of
+  an earlier one (copied LICENSE files, generated stubs, ...).
+
+    python benchmarks/synthetic_tree.py /tmp/tree --files 20000 --vendored-files 50000
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+
+SCENARIOS = {
+    # Small and quick; useful as a smoke test.
+    "small": dict(files=500, depth=3, fanout=3, binary_ratio=0.05, gitignore_every=4, vendored_files=0),
+    # A mid-sized project.
+    "project": dict(files=5000, depth=4, fanout=4, binary_ratio=0.05, gitignore_every=6, vendored_files=0),
+    # Deep nesting with many .gitignore files, stressing rule lookup.
+    "deep": dict(files=5000, depth=8, fanout=2, binary_ratio=0.02, gitignore_every=2, vendored_files=0),
+    # A project next to huge ignored dependency trees, stressing pruning.
+    "vendored": dict(files=2000, depth=3, fanout=4, binary_ratio=0.05, gitignore_every=8, vendored_files=50000),
+    # Mostly binary assets.
+    "binary_heavy": dict(files=3000, depth=3, fanout=4, binary_ratio=0.6, gitignore_every=8, vendored_files=0),
+    # Many byte-identical copies, exercising deduplication.
+    "duplicates": dict(files=5000, depth=4, fanout=4, binary_ratio=0.02, gitignore_every=6, vendored_files=0,
+                       duplicate_ratio=0.3),
+}
+
+DEFAULTS = dict(files=2000, depth=4, fanout=4, binary_ratio=0.05, gitignore_every=6, vendored_files=0,
+                duplicate_ratio=0.0, min_lines=5, max_lines=200, seed=0)
+
+NESTED_GITIGNORE = """\
+# generated
+*.log
+!keep_*.log
+/generated_*.txt
+tmp_*/
+"""
+ROOT_GITIGNORE = """\
+node_modules/
+vendor/
+*.tmp
+"""
+PNG_HEADER = b"\x89PNG\r\n\x1a\n"
+# Every file gets this mtime: fixed input for the benchmarks, and old enough
+# that the caches do not treat the files as "just modified".
+FIXED_MTIME = 1_600_000_000
+
+
+def _directories(depth, fanout):
+    """All directory paths (relative, '' for the root) of a full tree, breadth first."""
+    dirs, level = [""], [""]
+    for _ in range(depth):
+        level = [os.path.join(parent, f"dir{i}") if parent else f"dir{i}" for parent in level for i in range(fanout)]
+        dirs.extend(level)
+    return dirs
+
+
+def _write_text(path, rng, min_lines, max_lines):
+    line_count = rng.randint(min_lines, max_lines)
+    name = os.path.basename(path)
+    lines = [f"value_{n} = {rng.random()!r}  # line {n} of {name}\n" for n in range(line_count)]
+    data = "".join(lines).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+def _write_binary(path, rng, index):
+    size = rng.randint(512, 64 * 1024)
+    payload = bytes(rng.getrandbits(8) for _ in range(256)) * (size // 256 + 1)
+    data = (PNG_HEADER + payload if index % 2 else b"\0" + payload)[:size]
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+def build_tree(root, **params):
+    """Builds a tree under `root` (which must exist) and returns a manifest describing it."""
+    p = dict(DEFAULTS, **params)
+    rng = random.Random(p["seed"])
+    manifest = dict(params=p, text_files=0, binary_files=0, ignored_files=0, gitignore_files=0,
+                    vendored_files=0, duplicate_files=0, directories=0, bytes=0)
+
+    dirs = _directories(p["depth"], p["fanout"])
+    for rel_dir in dirs:
+        os.makedirs(os.path.join(root, rel_dir), exist_ok=True)
+    manifest["directories"] = len(dirs)
+
+    with open(os.path.join(root, ".gitignore"), "w", encoding="utf-8") as f:
+        f.write(ROOT_GITIGNORE)
+    manifest["gitignore_files"] += 1
+    for n, rel_dir in enumerate(dirs[1:], 1):
+        if p["gitignore_every"] and n % p["gitignore_every"] == 0:
+            dir_path = os.path.join(root, rel_dir)
+            with open(os.path.join(dir_path, ".gitignore"), "w", encoding="utf-8") as f:
+                f.write(NESTED_GITIGNORE)
+            manifest["gitignore_files"] += 1
+            # Files the rules above match (or un-match), so matching does real work.
+            for name in ("debug.log", "keep_audit.log", f"generated_{n}.txt"):
+                manifest["bytes"] += _write_text(os.path.join(dir_path, name), rng, 1, 5)
+                manifest["ignored_files" if name != "keep_audit.log" else "text_files"] += 1
+            os.makedirs(os.path.join(dir_path, f"tmp_{n}"), exist_ok=True)
+            manifest["bytes"] += _write_text(os.path.join(dir_path, f"tmp_{n}", "scratch.txt"), rng, 1, 5)
+            manifest["ignored_files"] += 1
+
+    binary_every = round(1 / p["binary_ratio"]) if p["binary_ratio"] else 0
+    duplicate_every = round(1 / p["duplicate_ratio"]) if p["duplicate_ratio"] else 0
+    text_paths = []
+    for i in range(p["files"]):
+        dir_path = os.path.join(root, dirs[i % len(dirs)])
+        if binary_every and i % binary_every == 0:
+            manifest["bytes"] += _write_binary(os.path.join(dir_path, f"asset_{i}.png"), rng, i)
+            manifest["binary_files"] += 1
+        elif duplicate_every and text_paths and i % duplicate_every == 0:
+            path = os.path.join(dir_path, f"copy_{i}.py")
+            shutil.copyfile(text_paths[rng.randrange(len(text_paths))], path)
+            manifest["bytes"] += os.path.getsize(path)
+            manifest["text_files"] += 1
+            manifest["duplicate_files"] += 1
+        else:
+            path = os.path.join(dir_path, f"module_{i}.py")
+            manifest["bytes"] += _write_text(path, rng, p["min_lines"], p["max_lines"])
+            manifest["text_files"] += 1
+            if duplicate_every:
+                text_paths.append(path)
+
+    for i in range(p["vendored_files"]):
+        top = "node_modules" if i % 2 else "vendor"
+        dir_path = os.path.join(root, top, f"package{i % 97}", "lib", f"part{i % 5}")
+        os.makedirs(dir_path, exist_ok=True)
+        manifest["bytes"] += _write_text(os.path.join(dir_path, f"index_{i}.js"), rng, 5, 40)
+        manifest["vendored_files"] += 1
+
+    for current_root, _, filenames in os.walk(root):
+        for filename in filenames:
+            os.utime(os.path.join(current_root, filename), (FIXED_MTIME, FIXED_MTIME))
+    return manifest
+
+
+def add_arguments(parser):
+    """Adds one --option per tree parameter (all default to None, i.e. "use the scenario value")."""
+    parser.add_argument("--files", type=int, help="number of project files (text and binary)")
+    parser.add_argument("--depth", type=int, help="directory nesting depth")
+    parser.add_argument("--fanout", type=int, help="subdirectories per directory")
+    parser.add_argument("--binary-ratio", type=float, help="share of binary files, 0..1")
+    parser.add_argument("--gitignore-every", type=int, help="put a nested .gitignore in every N-th directory (0: none)")
+    parser.add_argument("--vendored-files", type=int, help="files under the ignored node_modules/ and vendor/")
+    parser.add_argument("--duplicate-ratio", type=float, help="share of text files that copy an earlier one, 0..1")
+    parser.add_argument("--seed", type=int, help="random seed")
+
+
+def params_from_args(args, scenario=None):
+    params = dict(SCENARIOS[scenario]) if scenario else {}
+    for name in ("files", "depth", "fanout", "binary_ratio", "gitignore_every", "vendored_files", "duplicate_ratio",
+                 "seed"):
+        value = getattr(args, name)
+        if value is not None:
+            params[name] = value
+    return params
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("root", help="directory to create the tree in (must be empty or missing)")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), help="start from a predefined scenario")
+    add_arguments(parser)
+    args = parser.parse_args()
+    os.makedirs(args.root, exist_ok=True)
+    if os.listdir(args.root):
+        parser.error(f"{args.root} is not empty")
+    manifest = build_tree(args.root, **params_from_args(args, args.scenario))
+    print(json.dumps(manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()
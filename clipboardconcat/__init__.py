@@ -0,0 +1,72 @@
+"""
+ClipboardConcat core: concatenate text files and folders (respecting
+.gitignore) into one text, without any UI dependency.
+
+Names are imported from their submodules on first access, so importing the
+package itself costs next to nothing; the desktop app relies on that to show
+its window before any of the core is loaded.
+"""
+import importlib
+
+_EXPORTS = {
+    "DEFAULT_MAX_FILE_SIZE": "core",
+    "DEFAULT_READ_WORKERS": "core",
+    "ConcatStats": "core",
+    "FileFilter": "core",
+    "OutputSpool": "core",
+    "concat_paths": "core",
+    "estimate_tokens": "core",
+    "format_budget_status": "core",
+    "format_skip_counts": "core",
+    "iter_concat_chunks": "core",
+    "ContentCache": "cache",
+    "default_cache_dir": "cache",
+    "ClipboardCopy": "clipboard",
+    "FakeClipboard": "clipboard",
+    "select_backend": "clipboard",
+    "PATHSPEC_AVAILABLE": "ignore",
+    "GitignoreRules": "ignore",
+    "DropTrace": "trace",
+    "parse_drop_data": "drop",
+    "resolve_drop_paths": "drop",
+    "IncrementalConcat": "watch",
+    "WatchSession": "watch",
+}
+
+__all__ = [
+    "DEFAULT_MAX_FILE_SIZE",
+    "DEFAULT_READ_WORKERS",
+    "PATHSPEC_AVAILABLE",
+    "ClipboardCopy",
+    "ConcatStats",
+    "ContentCache",
+    "DropTrace",
+    "FakeClipboard",
+    "FileFilter",
+    "GitignoreRules",
+    "IncrementalConcat",
+    "OutputSpool",
+    "WatchSession",
+    "concat_paths",
+    "default_cache_dir",
+    "estimate_tokens",
+    "format_budget_status",
+    "format_skip_counts",
+    "iter_concat_chunks",
+    "parse_drop_data",
+    "resolve_drop_paths",
+    "select_backend",
+]
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,158 @@
+"""
+Headless command line interface.
+
+    python -m clipboardconcat src/ README.md -i "Review this code." -o out.txt
+
+Streams the same text the desktop app produces to stdout (or a file) without
+holding it in memory; a summary goes to stderr.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+from .core import (
+    DEFAULT_MAX_FILE_SIZE, DEFAULT_READ_WORKERS, OUTPUT_BUFFER_SIZE, ConcatStats, FileFilter, format_budget_status,
+    format_skip_counts, iter_concat_chunks,
+)
+from .cache import DEFAULT_CACHE_MAX_BYTES, ContentCache
+from .ignore import PATHSPEC_AVAILABLE
+from .drop import resolve_drop_paths
+from .trace import DropTrace
+
+logger = logging.getLogger("clipboardconcat")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m clipboardconcat",
+        description="Concatenate text files and folders (respecting .gitignore) into one text.",
+    )
+    parser.add_argument("paths", nargs="+", help="files and folders to concatenate, in output order")
+    parser.add_argument("-o", "--output", help="write to this file instead of stdout")
+    parser.add_argument("-i", "--instructions", default="", help="custom suffix/instructions added at the end")
+    parser.add_argument("--instructions-file", help="read the suffix/instructions from this file")
+    parser.add_argument("-j", "--workers", type=int, default=DEFAULT_READ_WORKERS,
+                        help=f"file read threads (default: {DEFAULT_READ_WORKERS}, 1 reads serially)")
+    parser.add_argument("--max-file-size", type=int, default=DEFAULT_MAX_FILE_SIZE,
+                        help=f"skip files larger than this many bytes, 0 for no limit (default: {DEFAULT_MAX_FILE_SIZE})")
+    parser.add_argument("--allow-ext", action="append", metavar="EXT",
+                        help="only read files with this extension, e.g. .py (repeatable)")
+    parser.add_argument("--deny-ext", action="append", metavar="EXT",
+                        help="never read files with this extension (repeatable)")
+    parser.add_argument("--dedup", action="store_true",
+                        help="replace files identical to an earlier one with a '--- Same as: ... ---' reference")
+    parser.add_argument("--max-tokens", type=int, metavar="N",
+                        help="stop at about N tokens (4 characters each, instructions included); "
+                             "files beyond the budget are not read")
+    parser.add_argument("--budget-mode", choices=("skip", "truncate"), default="skip",
+                        help="what happens to the file that does not fit the --max-tokens budget: leave it out "
+                             "(default) or cut it short with a '--- Truncated ---' marker")
+    parser.add_argument("--no-cache", action="store_true", help="read every file from disk; do not use the content cache")
+    parser.add_argument("--clear-cache", action="store_true", help="empty the content cache before running")
+    parser.add_argument("--cache-dir", help="content cache location (default: the per-user cache directory)")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_CACHE_MAX_BYTES // (1024 * 1024),
+                        help="evict least recently used cache entries beyond this size (default: %(default)s)")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="write per-phase timings, counters and the slowest files of this run as JSON")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log debug messages to stderr")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print the summary to stderr")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.ERROR if args.quiet else logging.WARNING,
+        format="%(levelname)s: %(message)s",
+    )
+
+    instructions = args.instructions
+    if args.instructions_file:
+        with open(args.instructions_file, "r", encoding="utf-8") as f:
+            instructions = f.read()
+    instructions = instructions.strip()
+
+    if not PATHSPEC_AVAILABLE:
+        logger.warning("'pathspec' not installed. .gitignore files won't be processed. `pip install pathspec`")
+
+    file_filter = FileFilter(
+        max_file_size=args.max_file_size or None,
+        allowed_extensions=args.allow_ext,
+        denied_extensions=args.deny_ext,
+    )
+    cache = None
+    if not args.no_cache:
+        cache = ContentCache(args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024)
+        if args.clear_cache:
+            cache.clear()
+    try:
+        return _write_output(args, instructions, file_filter, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def _write_output(args, instructions, file_filter, cache):
+    stats = ConcatStats()
+    trace = DropTrace()
+    paths, redundant = resolve_drop_paths(args.paths)
+    if redundant:
+        logger.info("skipped %d path(s) listed twice or inside another given folder", redundant)
+    chunks = iter_concat_chunks(
+        paths, instructions,
+        read_workers=args.workers, file_filter=file_filter, stats=stats, cache=cache, trace=trace, dedup=args.dedup,
+        max_tokens=args.max_tokens, truncate_last=args.budget_mode == "truncate",
+    )
+    start = time.perf_counter()
+
+    wrote_anything = False
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE) as out:
+            for chunk in chunks:
+                out.write(chunk)
+                wrote_anything = True
+    else:
+        if hasattr(sys.stdout, "reconfigure"):
+            sys.stdout.reconfigure(encoding="utf-8")
+        try:
+            for chunk in chunks:
+                sys.stdout.write(chunk)
+                wrote_anything = True
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # The reader went away (e.g. `| head`); stop quietly like other CLI tools.
+            chunks.close()
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return 1
+    trace.add("collect", time.perf_counter() - start)
+
+    for file_path in stats.budget_left_out:
+        logger.debug("left out by the token budget: %s", file_path)
+    for seconds, file_path, size in trace.slowest_files:
+        logger.debug("slow file: %.1f ms, %d bytes: %s", seconds * 1000, size, file_path)
+    if args.trace:
+        trace.write_json(args.trace, stats, paths=args.paths)
+    if not args.quiet:
+        print(
+            f"{stats.files_processed_count} file(s) processed, "
+            f"{stats.files_skipped_count} skipped{format_skip_counts(stats.skip_counts)}, "
+            f"{stats.git_ignored_count} file(s) and {stats.git_ignored_dir_count} folder(s) skipped by .gitignore rules.",
+            file=sys.stderr,
+        )
+        if args.dedup:
+            print(f"Duplicates: {stats.duplicate_count} file(s) replaced by a reference, "
+                  f"{stats.duplicate_bytes_saved} bytes saved.", file=sys.stderr)
+        print(f"Output: {stats.output_lines} line(s), {stats.output_chars} character(s), "
+              f"~{stats.output_tokens} token(s).", file=sys.stderr)
+        if stats.budget_reached:
+            print(format_budget_status(stats, args.max_tokens), file=sys.stderr)
+        if cache is not None:
+            print(f"Cache: {stats.cache_hits} hit(s), {stats.cache_misses} miss(es).", file=sys.stderr)
+        print(trace.summary(), file=sys.stderr)
+    return 0 if wrote_anything else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
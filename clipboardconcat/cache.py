@@ -0,0 +1,240 @@
+"""
+Persistent cache of file read results for repeated drops of the same folders.
+
+Entries are keyed by absolute path and validated against the file's inode,
+size and mtime_ns, so an unchanged file is served without being opened. Both
+decoded text and "rejected as binary/undecodable" verdicts are stored. The
+cache lives in an SQLite database under the user cache directory and is kept
+under a size limit by evicting the least recently used entries.
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from .core import SKIP_BINARY, SKIP_UNDECODABLE
+from .ignore import RACY_WINDOW_NS, clear_spec_cache
+
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+CACHE_FILE_NAME = "content_cache.sqlite3"
+# Pending writes and LRU touches are committed in batches of this many.
+COMMIT_EVERY = 256
+
+# Read results that depend only on the file's bytes, so they stay valid while the key matches.
+_CACHEABLE_RESULTS = (None, SKIP_BINARY, SKIP_UNDECODABLE)
+
+
+def default_cache_dir():
+    """Per-user cache directory for ClipboardConcat, following each platform's convention."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+        return os.path.join(base, "ClipboardConcat", "Cache")
+    if sys.platform == "darwin":
+        return os.path.expanduser("~/Library/Caches/ClipboardConcat")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "clipboardconcat")
+
+
+class ContentCache:
+    """
+    Thread-safe on-disk cache used by the read stage (see `read`).
+
+    `hits` and `misses` count lookups since the cache was opened; per-run
+    numbers are reported in ConcatStats.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._db_path = os.path.join(self.cache_dir, CACHE_FILE_NAME)
+        # Writes go through one shared connection under `_lock`; lookups borrow
+        # a connection from a pool so cache hits are not serialized. The pool
+        # only grows to the number of concurrent lookups and lives as long as
+        # the cache, not as long as the (per-drop) reader threads.
+        self._lock = threading.Lock()
+        self._readers = []       # every reader connection, closed by close()
+        self._idle_readers = []  # those not lent out right now
+        self._conn = sqlite3.connect(self._db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " path TEXT PRIMARY KEY, inode INTEGER, size INTEGER, mtime_ns INTEGER,"
+            " skip_reason TEXT, content TEXT, nbytes INTEGER, last_used INTEGER)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        # Compiled .gitignore files (see GitignoreRules); tiny, so not counted against max_bytes.
+        # `format` is ignore.spec_format(); tables from before it existed are dropped.
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(ignore_specs)")]
+        if columns and "format" not in columns:
+            self._conn.execute("DROP TABLE ignore_specs")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ignore_specs ("
+            " path TEXT PRIMARY KEY, inode INTEGER, size INTEGER, mtime_ns INTEGER, format TEXT, patterns TEXT)"
+        )
+        self._conn.commit()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()[0]
+        self._touched = {}  # path -> last_used, written on the next commit
+        self._uncommitted = 0
+        self._clock = self._conn.execute("SELECT COALESCE(MAX(last_used), 0) FROM entries").fetchone()[0]
+
+    def read(self, file_filter, file_path, reserve=None, trace=None):
+        """
+        Returns (read_result, cache_hit) for `file_path`, where read_result is
+        what `file_filter.read` would return. cache_hit is None when the cache
+        was not consulted (the file is rejected without reading it anyway).
+        """
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return file_filter.read(file_path, reserve, trace), None
+        if file_filter.precheck(file_path, st.st_size) is not None:
+            return file_filter.read(file_path, reserve, trace), None
+
+        file_path = os.path.abspath(file_path)
+        entry = self._get(file_path, st)
+        if entry is not None:
+            if reserve is not None:
+                reserve(entry[2])
+            return entry, True
+
+        read_result = file_filter.read(file_path, reserve, trace)
+        if read_result[1] in _CACHEABLE_RESULTS and time.time_ns() - st.st_mtime_ns > RACY_WINDOW_NS:
+            self._put(file_path, st, read_result)
+        return read_result, False
+
+    @contextmanager
+    def _reader(self):
+        """Lends a reader connection from the pool, opening one if all are in use."""
+        with self._lock:
+            conn = self._idle_readers.pop() if self._idle_readers else None
+        if conn is None:
+            conn = sqlite3.connect(self._db_path, check_same_thread=False)
+            with self._lock:
+                self._readers.append(conn)
+        try:
+            yield conn
+        finally:
+            with self._lock:
+                self._idle_readers.append(conn)
+
+    @property
+    def reader_count(self):
+        """Number of open reader connections (at most the peak number of concurrent lookups)."""
+        with self._lock:
+            return len(self._readers)
+
+    def _get(self, file_path, st):
+        with self._reader() as conn:
+            row = conn.execute(
+                "SELECT inode, size, mtime_ns, skip_reason, content FROM entries WHERE path = ?", (file_path,)
+            ).fetchone()
+        with self._lock:
+            if row is None or row[:3] != (st.st_ino, st.st_size, st.st_mtime_ns):
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._clock += 1
+            self._touched[file_path] = self._clock
+            self._note_write()
+            return row[4], row[3], st.st_size
+
+    def _put(self, file_path, st, read_result):
+        content, skip_reason, size = read_result
+        nbytes = size if skip_reason is None else 0
+        with self._lock:
+            old = self._conn.execute("SELECT nbytes FROM entries WHERE path = ?", (file_path,)).fetchone()
+            self._clock += 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (file_path, st.st_ino, st.st_size, st.st_mtime_ns, skip_reason, content, nbytes, self._clock),
+            )
+            self._total_bytes += nbytes - (old[0] if old else 0)
+            self._note_write()
+
+    def get_ignore_patterns(self, gitignore_path, key):
+        """
+        Compiled-pattern sources stored for `gitignore_path` if its (inode,
+        size, mtime_ns, spec format) is still `key`.
+        """
+        with self._reader() as conn:
+            row = conn.execute(
+                "SELECT inode, size, mtime_ns, format, patterns FROM ignore_specs WHERE path = ?", (gitignore_path,)
+            ).fetchone()
+        if row is None or tuple(row[:4]) != tuple(key):
+            return None
+        return json.loads(row[4])
+
+    def put_ignore_patterns(self, gitignore_path, key, patterns):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ignore_specs VALUES (?, ?, ?, ?, ?, ?)",
+                (gitignore_path, *key, json.dumps(patterns)),
+            )
+            self._note_write()
+
+    def _note_write(self):
+        self._uncommitted += 1
+        if self._uncommitted >= COMMIT_EVERY:
+            self._commit_locked()
+
+    def commit(self):
+        """Writes pending entries and LRU updates, evicting old entries if over `max_bytes`."""
+        with self._lock:
+            self._commit_locked()
+
+    def _commit_locked(self):
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE entries SET last_used = ? WHERE path = ?",
+                [(last_used, path) for path, last_used in self._touched.items()],
+            )
+            self._touched.clear()
+        if self._total_bytes > self.max_bytes:
+            self._evict_locked()
+        self._conn.commit()
+        self._uncommitted = 0
+
+    def _evict_locked(self):
+        # Evict down to 90% of the limit so eviction does not run on every commit.
+        target = self.max_bytes * 9 // 10
+        rows = self._conn.execute("SELECT path, nbytes FROM entries ORDER BY last_used")
+        doomed = []
+        for path, nbytes in rows:
+            if self._total_bytes <= target:
+                break
+            doomed.append((path,))
+            self._total_bytes -= nbytes
+        self._conn.executemany("DELETE FROM entries WHERE path = ?", doomed)
+
+    def clear(self):
+        """Removes every cached entry, including compiled .gitignore files (also those held in memory)."""
+        clear_spec_cache()
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("DELETE FROM ignore_specs")
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._touched.clear()
+            self._uncommitted = 0
+            self._total_bytes = 0
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def close(self):
+        self.commit()
+        with self._lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+            self._idle_readers.clear()
+            self._conn.close()
@@ -0,0 +1,400 @@
+"""
+Clipboard transfer for large results.
+
+A backend receives the text as a stream of chunks (`begin`, `write` per
+chunk, `finish`) rather than as one string, so a result of tens of MB is never
+materialized and is pushed to the clipboard piece by piece:
+
+* `TkClipboard` appends to Tk's own clipboard (no helper process; on X11 the
+  content is served by the app, so it is gone once the app exits);
+* `XclipClipboard` / `WlCopyClipboard` pipe the chunks into one `xclip` or
+  `wl-copy` process, which keeps serving the clipboard after the app exits;
+* `PyperclipClipboard` is the fallback when nothing else is available;
+* `FakeClipboard` keeps the text in memory, for tests and headless runs.
+
+`ClipboardCopy` runs a transfer off the UI thread and reports the transferred
+size and time; `select_backend` picks the backend for the current session.
+"""
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Size of the pieces handed to a backend. Small results go in one piece; large
+# ones are split so no single write (or Tk call) holds things up for long.
+CLIPBOARD_CHUNK_CHARS = 1024 * 1024
+# Seconds a clipboard helper gets to take over the data after its input ends.
+CLIPBOARD_HELPER_TIMEOUT = 30
+# CLIPBOARDCONCAT_CLIPBOARD=tk|xclip|wl-copy|pyperclip|fake forces a backend.
+CLIPBOARD_BACKEND_ENV = "CLIPBOARDCONCAT_CLIPBOARD"
+
+
+class ClipboardError(Exception):
+    pass
+
+
+class ClipboardBackend:
+    """
+    Base class of the backends. `thread_safe` is False for backends that must
+    be driven from the UI thread; ClipboardCopy then only prepares the chunks
+    on its worker thread and the caller feeds them in with `step()`. Backends
+    with `binary` set are given UTF-8 bytes instead of strings.
+    """
+
+    name = None
+    thread_safe = True
+    binary = False
+
+    def begin(self):
+        pass
+
+    def write(self, chunk):
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+    def abort(self):
+        """Gives up on a transfer started with begin(); must not raise."""
+
+
+class TkClipboard(ClipboardBackend):
+    """Tk's native clipboard. `widget` is any Tk widget (usually the root window)."""
+
+    name = "tk"
+    thread_safe = False
+
+    def __init__(self, widget):
+        self.widget = widget
+
+    def begin(self):
+        self.widget.clipboard_clear()
+
+    def write(self, chunk):
+        self.widget.clipboard_append(chunk)
+
+    def abort(self):
+        try:
+            self.widget.clipboard_clear()
+        except Exception:  # The window may already be gone.
+            pass
+
+
+class _PipeClipboard(ClipboardBackend):
+    """A clipboard helper that reads the text from stdin and then serves it in the background."""
+
+    command = ()
+    binary = True
+
+    def __init__(self):
+        self._process = None
+
+    def begin(self):
+        try:
+            # stdout/stderr go to /dev/null: the helper forks a child that keeps
+            # serving the clipboard and would otherwise hold our pipes open.
+            self._process = subprocess.Popen(
+                self.command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+        except OSError as e:
+            raise ClipboardError(f"could not start {self.name}: {e}") from e
+
+    def write(self, chunk):
+        try:
+            self._process.stdin.write(chunk)
+        except OSError as e:  # Typically a broken pipe: the helper died (no display, ...).
+            raise ClipboardError(f"{self.name} stopped reading: {e}") from e
+
+    def finish(self):
+        process, self._process = self._process, None
+        try:
+            process.stdin.close()
+            returncode = process.wait(timeout=CLIPBOARD_HELPER_TIMEOUT)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            process.kill()
+            raise ClipboardError(f"{self.name} did not finish: {e}") from e
+        if returncode != 0:
+            raise ClipboardError(f"{self.name} exited with status {returncode}")
+
+    def abort(self):
+        process, self._process = self._process, None
+        if process is not None:
+            process.kill()
+            process.wait()
+
+
+class XclipClipboard(_PipeClipboard):
+    name = "xclip"
+    command = ("xclip", "-selection", "clipboard", "-in")
+
+
+class WlCopyClipboard(_PipeClipboard):
+    name = "wl-copy"
+    command = ("wl-copy", "--type", "text/plain;charset=utf-8")
+
+
+class PyperclipClipboard(ClipboardBackend):
+    """pyperclip needs the whole text at once, so the chunks are joined in finish()."""
+
+    name = "pyperclip"
+
+    def begin(self):
+        self._chunks = []
+
+    def write(self, chunk):
+        self._chunks.append(chunk)
+
+    def finish(self):
+        import pyperclip
+
+        text, self._chunks = "".join(self._chunks), []
+        try:
+            pyperclip.copy(text)
+        except pyperclip.PyperclipException as e:
+            raise ClipboardError(str(e)) from e
+
+    def abort(self):
+        self._chunks = []
+
+
+class FakeClipboard(ClipboardBackend):
+    """
+    In-memory clipboard for tests. `text` is the last completed transfer and
+    `chunks` the pieces it arrived in; `delay` (seconds per chunk) simulates a
+    slow helper, and `thread_safe=False` exercises the UI-thread path.
+    """
+
+    name = "fake"
+
+    def __init__(self, delay=0.0, thread_safe=True):
+        self.delay = delay
+        self.thread_safe = thread_safe
+        self.text = None
+        self.chunks = []
+        self._pending = []
+
+    def begin(self):
+        self._pending = []
+
+    def write(self, chunk):
+        if self.delay:
+            time.sleep(self.delay)
+        self._pending.append(chunk)
+
+    def finish(self):
+        self.chunks, self._pending = self._pending, []
+        self.text = "".join(self.chunks)
+
+    def abort(self):
+        self._pending = []
+
+
+_BACKENDS = {
+    "xclip": XclipClipboard,
+    "wl-copy": WlCopyClipboard,
+    "pyperclip": PyperclipClipboard,
+    "fake": FakeClipboard,
+}
+
+
+def select_backend(widget=None, environ=None):
+    """
+    The clipboard backend for this session: wl-copy on Wayland and xclip on
+    X11 when installed (their content outlives the app), otherwise Tk's own
+    clipboard if a `widget` is given, otherwise pyperclip.
+    """
+    environ = os.environ if environ is None else environ
+    forced = environ.get(CLIPBOARD_BACKEND_ENV)
+    if forced:
+        if forced == "tk" and widget is not None:
+            return TkClipboard(widget)
+        if forced in _BACKENDS:
+            return _BACKENDS[forced]()
+        logger.warning("Unknown clipboard backend %s=%s, choosing one automatically", CLIPBOARD_BACKEND_ENV, forced)
+
+    if sys.platform not in ("win32", "darwin"):
+        if environ.get("WAYLAND_DISPLAY") and shutil.which("wl-copy"):
+            return WlCopyClipboard()
+        if environ.get("DISPLAY") and shutil.which("xclip"):
+            return XclipClipboard()
+    if widget is not None:
+        return TkClipboard(widget)
+    return PyperclipClipboard()
+
+
+def rechunk(chunks, size=CLIPBOARD_CHUNK_CHARS):
+    """Regroups an iterable of strings into pieces of about `size` characters."""
+    pending, pending_chars = [], 0
+    for chunk in chunks:
+        if len(chunk) >= size and not pending:
+            yield chunk
+            continue
+        pending.append(chunk)
+        pending_chars += len(chunk)
+        if pending_chars >= size:
+            yield "".join(pending)
+            pending, pending_chars = [], 0
+    if pending:
+        yield "".join(pending)
+
+
+class ClipboardCopy:
+    """
+    One clipboard transfer of `chunks` (an iterable of strings), run on a
+    worker thread.
+
+    Thread-safe backends are written to from the worker itself. For the others
+    the worker only produces the pieces, and the UI thread writes them with
+    `step()` until it returns True, one piece per call, so the UI stays
+    responsive in between.
+
+    When done, `error` is None on success or the exception, and `chars`,
+    `bytes` (UTF-8) and `seconds` describe what was transferred.
+    """
+
+    def __init__(self, backend, chunks, chunk_chars=CLIPBOARD_CHUNK_CHARS):
+        self.backend = backend
+        self.chunks = chunks
+        self.chunk_chars = chunk_chars
+        self.chars = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.error = None
+        self.done = False
+        self.cancel_event = threading.Event()
+        self._pieces = None if backend.thread_safe else queue.Queue(maxsize=4)
+        self._started = None
+        self._begun = False
+        self._thread = threading.Thread(target=self.run, name="ClipboardCopy", daemon=True)
+
+    def start(self):
+        self._started = time.perf_counter()
+        if not self.backend.thread_safe:
+            self._begin()
+        self._thread.start()
+
+    def cancel(self):
+        """Stops the transfer. Call from the UI thread; a started Tk transfer is rolled back right away."""
+        self.cancel_event.set()
+        if self._pieces is not None and self._begun:
+            self._fail(ClipboardError("cancelled"))
+
+    def wait(self, timeout=None):
+        """
+        Blocks until the transfer is done, doing the UI thread's part itself
+        (tests and headless use). Returns `done`.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.done and (deadline is None or time.monotonic() < deadline):
+            if self._pieces is None:
+                self._thread.join(0.05)
+            elif not self.step():
+                time.sleep(0.001)
+        return self.done
+
+    def run(self):
+        """Worker thread: reads the chunks and writes them (or queues them for step())."""
+        pieces = rechunk(self.chunks, self.chunk_chars)
+        try:
+            if self.backend.thread_safe:
+                self._begin()
+            for piece in pieces:
+                if self.cancel_event.is_set():
+                    break
+                if self._pieces is None:
+                    self._write(piece)
+                else:
+                    self._put(piece)
+            if self._pieces is None:
+                self._end()
+        except Exception as e:
+            logger.debug("Clipboard transfer failed", exc_info=True)
+            if self._pieces is None:
+                self._fail(e)
+            else:
+                self._put(e)
+        finally:
+            # Closed here, on this thread: a source like IncrementalConcat.iter_chunks
+            # holds a lock while it is suspended.
+            pieces.close()
+            if hasattr(self.chunks, "close"):
+                self.chunks.close()
+            if self._pieces is not None:
+                self._put(None)
+
+    def step(self):
+        """UI thread, non-thread-safe backends: writes the next piece if one is ready. True once done."""
+        if self.done:
+            return True
+        if self._pieces is None:
+            return False
+        try:
+            piece = self._pieces.get_nowait()
+        except queue.Empty:
+            return False
+        if piece is None:
+            self._end()
+        elif isinstance(piece, Exception):
+            self._fail(piece)
+        elif not self.cancel_event.is_set():
+            try:
+                self._write(piece)
+            except Exception as e:
+                self._fail(e)
+        return self.done
+
+    def _put(self, item):
+        # Bounded, so a slow UI thread throttles the reader; gives up once
+        # cancelled, as nobody may be stepping any more.
+        while not self.cancel_event.is_set():
+            try:
+                self._pieces.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _begin(self):
+        self.backend.begin()
+        self._begun = True
+
+    def _write(self, piece):
+        data = piece.encode('utf-8')
+        self.backend.write(data if self.backend.binary else piece)
+        self.chars += len(piece)
+        self.bytes += len(data)
+
+    def _end(self):
+        if self.done:
+            return
+        if self.cancel_event.is_set():
+            self._fail(ClipboardError("cancelled"))
+            return
+        try:
+            self.backend.finish()
+        except Exception as e:
+            self._fail(e)
+            return
+        self.seconds = time.perf_counter() - self._started
+        self.done = True
+
+    def _fail(self, error):
+        if self.done:
+            return
+        if self._begun:
+            self.backend.abort()
+        self.error = error
+        self.seconds = time.perf_counter() - self._started
+        self.done = True
+
+
+def format_size(num_bytes):
+    """'12.3 MB' / '850 KB' for status lines."""
+    if num_bytes >= 1024 * 1024:
+        return f"{num_bytes / (1024 * 1024):.1f} MB"
+    return f"{num_bytes / 1024:.0f} KB"
@@ -0,0 +1,759 @@
+"""
+UI-free concatenation core.
+
+`iter_concat_chunks` walks the given files and folders (respecting .gitignore),
+reads the text files and yields the output piece by piece: the
+`--- Content from ...` headers, file contents, separators and the instructions
+suffix. Joining the chunks gives exactly the text the desktop app copies. The
+Tk app, the `python -m clipboardconcat` CLI and the benchmarks are all clients
+of this module.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .ignore import PATHSPEC_AVAILABLE, GitignoreRules
+
+# Files are read by a thread pool while the walk continues; reading is mostly
+# I/O latency (network shares, cold caches), so more threads than cores pay off.
+# 1 reads serially on the walking thread.
+DEFAULT_READ_WORKERS = 8
+READ_AHEAD_PER_WORKER = 4
+# Upper bound on file bytes read but not yet consumed, so memory stays flat on
+# huge trees no matter how many reads are in flight.
+READ_AHEAD_MAX_BYTES = 8 * 1024 * 1024
+
+# Pre-read classification (see FileFilter).
+DEFAULT_MAX_FILE_SIZE = 16 * 1024 * 1024
+SNIFF_BYTES = 8192
+BINARY_SIGNATURES = (
+    b'\x89PNG', b'GIF87a', b'GIF89a', b'\xff\xd8\xff', b'%PDF-', b'PK\x03\x04', b'\x1f\x8b',
+    b'\x7fELF', b'\xca\xfe\xba\xbe', b'\xcf\xfa\xed\xfe', b'\xce\xfa\xed\xfe', b'SQLite format 3',
+    b'\xfd7zXZ', b'7z\xbc\xaf\x27\x1c', b'Rar!\x1a\x07', b'\x28\xb5\x2f\xfd', b'OggS', b'RIFF',
+    b'\x00asm', b'\x93NUMPY', b'\x89HDF',
+)
+SKIP_BINARY = "binary"
+SKIP_TOO_LARGE = "too large"
+SKIP_UNDECODABLE = "undecodable"
+SKIP_UNREADABLE = "unreadable"
+SKIP_EXTENSION = "excluded by extension"
+
+# Results up to SPOOL_MAX_MEMORY bytes stay in memory; larger ones are spooled
+# to a temporary file. OUTPUT_BUFFER_SIZE is the I/O buffer used when writing
+# or copying results, so saving never needs the whole text in memory.
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+FILE_SEPARATOR = "\n\n"
+FILE_HEADER_PREFIX = "--- Content from"
+FILE_HEADER_SUFFIX = " ---\n"
+DUPLICATE_HEADER_PREFIX = "--- Same as"
+APPENDED_INSTRUCTIONS_HEADER = "\n\n--- Appended Instructions ---\n"
+INSTRUCTIONS_ONLY_HEADER = "--- Instructions ---\n"
+
+# Token counts are estimates: about four characters per token is the usual
+# rule of thumb for English text and source code with current LLM tokenizers.
+CHARS_PER_TOKEN = 4
+# Ends a file that was cut short to stay within a token budget (see TokenBudget).
+TRUNCATION_MARKER = "--- Truncated: token budget reached ---\n"
+
+
+class FileFilter:
+    """
+    Decides whether a file is worth reading, using as little I/O as possible.
+
+    `read` checks the extension lists and the `os.stat` size first, then looks
+    at the first SNIFF_BYTES for NUL bytes and well-known binary signatures, and
+    only then reads and strictly decodes the rest of the file. Binaries and huge
+    files are therefore rejected after at most a few KB of I/O instead of being
+    loaded and failing to decode.
+    """
+
+    def __init__(self, max_file_size=DEFAULT_MAX_FILE_SIZE, allowed_extensions=None, denied_extensions=None):
+        """
+        max_file_size: files larger than this many bytes are skipped (None for no limit).
+        allowed_extensions: if given, only files with one of these extensions are read.
+        denied_extensions: files with one of these extensions are never read.
+        Extensions include the dot and are compared case-insensitively ('.png').
+        """
+        self.max_file_size = max_file_size
+        self.allowed_extensions = {ext.lower() for ext in allowed_extensions} if allowed_extensions is not None else None
+        self.denied_extensions = {ext.lower() for ext in denied_extensions or ()}
+
+    def precheck(self, file_path, size=None):
+        """Returns the skip reason decided without reading the file (extension, then size), or None."""
+        if self.allowed_extensions is not None or self.denied_extensions:
+            ext = os.path.splitext(file_path)[1].lower()
+            if ext in self.denied_extensions or (self.allowed_extensions is not None and ext not in self.allowed_extensions):
+                return SKIP_EXTENSION
+        if size is not None and self.max_file_size is not None and size > self.max_file_size:
+            return SKIP_TOO_LARGE
+        return None
+
+    def read(self, file_path, reserve=None, trace=None):
+        """
+        Returns (content, skip_reason, size). skip_reason is None when content was read.
+
+        If given, `reserve(size)` is called once the size is known and before
+        the file's content is read; it may block to throttle memory use. With a
+        DropTrace, the I/O time (not counting `reserve`) goes to its "read"
+        phase and the decoding time to "decode".
+        """
+        if self.precheck(file_path) is not None:
+            return None, SKIP_EXTENSION, 0
+        start = time.perf_counter()
+        reserve_seconds = 0.0
+        if trace is not None and reserve is not None:
+            def timed_reserve(size, reserve=reserve):
+                nonlocal reserve_seconds
+                reserve_start = time.perf_counter()
+                reserve(size)
+                reserve_seconds = time.perf_counter() - reserve_start
+            reserve = timed_reserve
+        try:
+            data, skip_reason, size = self._read_bytes(file_path, reserve)
+        finally:
+            if trace is not None:
+                trace.add("read", time.perf_counter() - start - reserve_seconds)
+        if skip_reason is not None:
+            return None, skip_reason, size
+        start = time.perf_counter()
+        try:
+            content = data.decode('utf-8', errors='strict')
+        except UnicodeDecodeError:
+            return None, SKIP_UNDECODABLE, size
+        finally:
+            if trace is not None:
+                trace.add("decode", time.perf_counter() - start)
+        # Same newline translation as reading in text mode.
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        return content, None, size
+
+    def _read_bytes(self, file_path, reserve):
+        """(data, skip_reason, size): the size check, the binary sniff and the actual read."""
+        try:
+            with open(file_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if self.max_file_size is not None and size > self.max_file_size:
+                    return None, SKIP_TOO_LARGE, size
+                if reserve is not None:
+                    reserve(size)
+                head = f.read(SNIFF_BYTES)
+                if b'\0' in head or head.startswith(BINARY_SIGNATURES):
+                    return None, SKIP_BINARY, size
+                return head + f.read(), None, size
+        except OSError:
+            return None, SKIP_UNREADABLE, 0
+
+
+class ConcatStats:
+    """
+    Counters of one concatenation run. They are updated while chunks are
+    produced, so another thread may read them for progress reporting.
+    """
+
+    def __init__(self):
+        self.dirs_visited = 0
+        self.files_scanned = 0
+        self.files_processed_count = 0
+        self.skip_counts = {}  # skip reason -> number of files
+        self.git_ignored_count = 0
+        self.git_ignored_dir_count = 0
+        self.bytes_read = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Files whose content was replaced by a reference to an identical earlier file.
+        self.duplicate_count = 0
+        self.duplicate_bytes_saved = 0
+        # Files not in the output because the token budget ran out (paths, in
+        # output order; later ones were never read, see count_left_out), and
+        # the file cut short.
+        self.budget_left_out = []
+        self.budget_truncated_file = None
+        # Size of the produced text, counted chunk by chunk as it is yielded.
+        self.output_chars = 0
+        self.output_newlines = 0
+        self.output_ends_with_newline = True
+
+    @property
+    def files_skipped_count(self):
+        return sum(self.skip_counts.values())
+
+    @property
+    def output_lines(self):
+        """Number of lines in the output, counting a final line without a trailing newline."""
+        if not self.output_chars:
+            return 0
+        return self.output_newlines + (0 if self.output_ends_with_newline else 1)
+
+    @property
+    def output_tokens(self):
+        """Approximate number of tokens in the output (see estimate_tokens)."""
+        return estimate_tokens(self.output_chars)
+
+    @property
+    def budget_reached(self):
+        return bool(self.budget_left_out) or self.budget_truncated_file is not None
+
+    def count_skip(self, skip_reason):
+        self.skip_counts[skip_reason] = self.skip_counts.get(skip_reason, 0) + 1
+
+    def count_left_out(self, file_path, file_filter):
+        """
+        Counts a file the token budget left out without reading it: one the
+        filter rejects by its name alone is counted as skipped, as it would be
+        with budget to spare; any other is listed in budget_left_out.
+        """
+        skip_reason = file_filter.precheck(file_path)
+        if skip_reason is None:
+            self.budget_left_out.append(file_path)
+        else:
+            self.count_skip(skip_reason)
+
+    def count_output(self, chunk):
+        if chunk:
+            self.output_chars += len(chunk)
+            self.output_newlines += chunk.count('\n')
+            self.output_ends_with_newline = chunk.endswith('\n')
+
+
+def format_skip_counts(skip_counts):
+    """' (2 binary, 1 too large)' style breakdown for status lines, '' when nothing was skipped."""
+    if not skip_counts:
+        return ""
+    return " (" + ", ".join(f"{count} {reason}" for reason, count in sorted(skip_counts.items())) + ")"
+
+
+def estimate_tokens(char_count):
+    """Approximate token count of `char_count` characters of text, rounded up."""
+    return -(-char_count // CHARS_PER_TOKEN)
+
+
+def format_budget_status(stats, max_tokens, names=5):
+    """
+    'Token budget of 8000 reached: a.py truncated, 3 file(s) left out: b.py, c.py, d.py.'
+    for status lines (at most `names` file names), '' when everything fit.
+    """
+    if not stats.budget_reached:
+        return ""
+    parts = []
+    if stats.budget_truncated_file is not None:
+        parts.append(f"{os.path.basename(stats.budget_truncated_file)} truncated")
+    left_out = stats.budget_left_out
+    if left_out:
+        listed = ", ".join(os.path.basename(p) for p in left_out[:names])
+        more = f" and {len(left_out) - names} more" if len(left_out) > names else ""
+        parts.append(f"{len(left_out)} file(s) left out: {listed}{more}")
+    return f"Token budget of {max_tokens} reached: " + ", ".join(parts) + "."
+
+
+def _is_cancelled(cancel_event):
+    return cancel_event is not None and cancel_event.is_set()
+
+
+def file_header(file_path):
+    """Header of a file that was dropped directly."""
+    return f"{FILE_HEADER_PREFIX}: {os.path.basename(file_path)}{FILE_HEADER_SUFFIX}"
+
+
+def folder_file_header(folder_path, file_path):
+    """Header of a file found inside the dropped folder `folder_path`."""
+    rel_path = os.path.relpath(file_path, folder_path)
+    return f"{FILE_HEADER_PREFIX} (folder {os.path.basename(folder_path)}): {rel_path}{FILE_HEADER_SUFFIX}"
+
+
+def duplicate_reference(header):
+    """
+    What replaces the content of a file identical to the one under `header`:
+    '--- Same as: name ---' or '--- Same as (folder X): rel/path ---'.
+    """
+    return DUPLICATE_HEADER_PREFIX + header[len(FILE_HEADER_PREFIX):]
+
+
+def content_digest(content):
+    # SHA-256 rather than a faster non-cryptographic hash: a crafted collision
+    # must not be able to hide a file's content behind a reference.
+    return hashlib.sha256(content.encode('utf-8', 'surrogatepass')).digest()
+
+
+def _timed_iter(iterable, trace, phase):
+    """Yields from `iterable`, adding the time spent producing each item (not consuming it) to `phase`."""
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            trace.add(phase, time.perf_counter() - start)
+        yield item
+
+
+def iter_files(paths, stats, cancel_event=None, trace=None, cache=None):
+    """
+    Yields (file path, header) for every file to read, in output order. Stops early when cancelled.
+
+    With a DropTrace, directory listing goes to its "walk" phase, loading
+    .gitignore files to "ignore" and checking names against them to "match".
+    A ContentCache also keeps the compiled .gitignore files across runs.
+    """
+    clock = time.perf_counter
+    for item_path_raw in paths:
+        if _is_cancelled(cancel_event):
+            return
+        item_path = os.path.normpath(item_path_raw) 
+
+        if not os.path.exists(item_path):
+            continue
+
+        if os.path.isfile(item_path):
+            stats.files_scanned += 1
+            yield item_path, file_header(item_path)
+        elif os.path.isdir(item_path):
+            ignore_rules = GitignoreRules(item_path, store=cache) if PATHSPEC_AVAILABLE else None
+
+            # Single topdown walk: each directory's .gitignore is loaded as the walk
+            # reaches it, and ignored directories are pruned from `dirs` so they are
+            # never entered.
+            walk = os.walk(item_path, topdown=True)
+            if trace is not None:
+                walk = _timed_iter(walk, trace, "walk")
+            for current_root, dirs, filenames in walk:
+                if _is_cancelled(cancel_event):
+                    return
+                stats.dirs_visited += 1
+                if '.git' in dirs: dirs.remove('.git')
+                if ignore_rules:
+                    start = clock()
+                    rel_root = ignore_rules.enter_dir(current_root, filenames)
+                    if trace is not None:
+                        trace.add("ignore", clock() - start)
+                    start = clock()
+                    kept_dirs = []
+                    for dirname in dirs:
+                        if ignore_rules.is_ignored(rel_root, dirname, is_dir=True):
+                            stats.git_ignored_dir_count += 1
+                        else:
+                            kept_dirs.append(dirname)
+                    dirs[:] = kept_dirs
+                    kept_files = []
+                    for filename in filenames:
+                        if ignore_rules.is_ignored(rel_root, filename):
+                            stats.git_ignored_count += 1
+                        else:
+                            kept_files.append(filename)
+                    if trace is not None:
+                        trace.add("match", clock() - start)
+                    stats.files_scanned += len(filenames) - len(kept_files)
+                else:
+                    kept_files = filenames
+                for filename in kept_files:
+                    if _is_cancelled(cancel_event):
+                        return
+                    stats.files_scanned += 1
+                    file_full_path = os.path.join(current_root, filename)
+                    yield file_full_path, folder_file_header(item_path, file_full_path)
+
+
+class _ReadAheadBudget:
+    """
+    Limits the bytes held by reads that ran ahead of the consumer.
+
+    Reservations are granted strictly in submission order (one ticket per
+    file), and a reservation always fits when nothing is held. Since results
+    are consumed in the same order, the oldest pending read can always proceed
+    and the pool cannot deadlock on the budget.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.held = 0
+        self.next_ticket = 0
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def acquire(self, ticket, size):
+        with self._cond:
+            self._cond.wait_for(lambda: self.closed or (
+                self.next_ticket == ticket and (self.held == 0 or self.held + size <= self.max_bytes)
+            ))
+            if self.closed:
+                raise _ReadAheadClosed()
+            self.held += size
+            self.next_ticket += 1
+            self._cond.notify_all()
+
+    def release(self, size):
+        with self._cond:
+            self.held -= size
+            self._cond.notify_all()
+
+    def close(self):
+        """Wakes and aborts every waiting read (cancellation or early exit)."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class _ReadAheadClosed(Exception):
+    pass
+
+
+def iter_read_files(paths, stats, read_workers=DEFAULT_READ_WORKERS, file_filter=None, cancel_event=None,
+                    cache=None, trace=None, duplicates=None, token_budget=None):
+    """
+    Yields (header, content) for every text file under `paths`, in walk order.
+
+    Files are read by a pool of `read_workers` threads fed by the walk, but
+    results come out strictly in walk order, so the output is identical to a
+    serial run; at most READ_AHEAD_PER_WORKER reads per worker are in flight,
+    which keeps memory bounded on huge trees. With a ContentCache, unchanged
+    files are served from it instead of being read. With a DropTrace, phase
+    times and the slowest files are recorded in it. With a DuplicateFilter,
+    contents are hashed by the reader threads and duplicates are replaced by
+    references as the files come out. With a TokenBudget, reading stops as
+    soon as it is used up: reads in flight are cancelled, and the rest of the
+    walk only lists the files left out (see ConcatStats.count_left_out).
+    """
+    file_filter = file_filter or FileFilter()
+    read_workers = max(1, read_workers)
+
+    def read_one(file_path, reserve=None):
+        start = time.perf_counter()
+        if cache is None:
+            read_result_and_hit = file_filter.read(file_path, reserve, trace), None
+        else:
+            read_result_and_hit = cache.read(file_filter, file_path, reserve, trace)
+        if trace is not None:
+            trace.record_file(file_path, time.perf_counter() - start, read_result_and_hit[0][2])
+        content, skip_reason, _ = read_result_and_hit[0]
+        digest = duplicates.digest(content) if duplicates is not None and skip_reason is None else None
+        return read_result_and_hit + (digest,)
+
+    def accept(read_result_and_hit):
+        read_result, cache_hit, _ = read_result_and_hit
+        if cache_hit is not None:
+            if cache_hit:
+                stats.cache_hits += 1
+            else:
+                stats.cache_misses += 1
+        content, skip_reason, size = read_result
+        if skip_reason is None:
+            stats.bytes_read += size
+            return True
+        stats.count_skip(skip_reason)
+        return False
+
+    def output_content(file_path, header, read_result_and_hit):
+        return admit_file(file_path, header, read_result_and_hit[0][0], stats, duplicates, token_budget,
+                          read_result_and_hit[2])
+
+    def budget_used_up():
+        return token_budget is not None and token_budget.exhausted
+
+    if read_workers == 1:
+        try:
+            for file_path, header in iter_files(paths, stats, cancel_event, trace, cache):
+                if budget_used_up():
+                    stats.count_left_out(file_path, file_filter)
+                    continue
+                read_result = read_one(file_path)
+                if accept(read_result):
+                    content = output_content(file_path, header, read_result)
+                    if content is not None:
+                        yield header, content
+        finally:
+            if cache is not None:
+                cache.commit()
+        return
+
+    read_ahead = _ReadAheadBudget(READ_AHEAD_MAX_BYTES)
+
+    def read_in_turn(ticket, file_path):
+        reserved = []
+
+        def reserve(size):
+            read_ahead.acquire(ticket, size)
+            reserved.append(size)
+
+        try:
+            return read_one(file_path, reserve), sum(reserved)
+        finally:
+            if not reserved:  # Skipped before reading; still take the turn so later reads proceed.
+                read_ahead.acquire(ticket, 0)
+
+    def take(future):
+        read_result, reserved_size = future.result()
+        read_ahead.release(reserved_size)
+        return read_result
+
+    def stop_reading():
+        # The budget is used up: abort the reads still in flight and list their files as left out.
+        read_ahead.close()
+        executor.shutdown(wait=False, cancel_futures=True)
+        for file_path, _, _ in pending:
+            stats.count_left_out(file_path, file_filter)
+        pending.clear()
+
+    executor = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="ClipboardConcat-read")
+    pending = deque()
+    max_pending = read_workers * READ_AHEAD_PER_WORKER
+    try:
+        for ticket, (file_path, header) in enumerate(iter_files(paths, stats, cancel_event, trace, cache)):
+            if budget_used_up():
+                stats.count_left_out(file_path, file_filter)
+                continue
+            pending.append((file_path, header, executor.submit(read_in_turn, ticket, file_path)))
+            if len(pending) >= max_pending:
+                file_path, header, future = pending.popleft()
+                read_result = take(future)
+                if accept(read_result):
+                    content = output_content(file_path, header, read_result)
+                    if content is not None:
+                        yield header, content
+                if budget_used_up():
+                    stop_reading()
+        while pending and not _is_cancelled(cancel_event):
+            file_path, header, future = pending.popleft()
+            read_result = take(future)
+            if accept(read_result):
+                content = output_content(file_path, header, read_result)
+                if content is not None:
+                    yield header, content
+            if budget_used_up():
+                stop_reading()
+    finally:
+        read_ahead.close()
+        executor.shutdown(wait=False, cancel_futures=True)
+        if cache is not None:
+            cache.commit()
+
+
+def iter_concat_chunks(paths, instructions="", read_workers=DEFAULT_READ_WORKERS, file_filter=None,
+                       stats=None, cancel_event=None, cache=None, trace=None, dedup=False, max_tokens=None,
+                       truncate_last=False):
+    """
+    Yields the concatenated output for `paths` as text chunks.
+
+    `instructions` (already stripped) are appended at the end, exactly as the
+    app does. Pass a ConcatStats to follow progress or read the final counts,
+    and a threading.Event as `cancel_event` to stop early; closing the
+    generator also stops the walk and the read pool. `cache` is an optional
+    clipboardconcat.cache.ContentCache, `trace` an optional
+    clipboardconcat.trace.DropTrace. With `dedup`, files identical to an
+    earlier one are replaced by a reference to it (see DuplicateFilter).
+    With `max_tokens`, the output stops at about that many tokens (see
+    TokenBudget) and no file is read once the budget is used up.
+    """
+    stats = stats if stats is not None else ConcatStats()
+    token_budget = TokenBudget(max_tokens, truncate_last, instructions) if max_tokens is not None else None
+    raw_chunks = _iter_raw_chunks(paths, instructions, read_workers, file_filter, stats, cancel_event, cache, trace,
+                                  dedup, token_budget)
+    for chunk in raw_chunks:
+        stats.count_output(chunk)
+        yield chunk
+
+
+def _iter_raw_chunks(paths, instructions, read_workers, file_filter, stats, cancel_event, cache, trace, dedup,
+                     token_budget=None):
+    duplicates = DuplicateFilter(stats, trace) if dedup else None
+    files = iter_read_files(paths, stats, read_workers, file_filter, cancel_event, cache, trace, duplicates,
+                            token_budget)
+    return assemble_chunks(files, instructions, cancel_event)
+
+
+class DuplicateFilter:
+    """
+    Content-hash deduplication of (header, content) pairs, in output order.
+
+    The first file with a given content is kept in full; every later identical
+    file keeps its header but its content becomes a reference line to the first
+    one (see duplicate_reference). Files shorter than that line (empty
+    `__init__.py` files, ...) are left as they are, since a reference would
+    not save anything. Savings go to `stats`, hashing time to the "hash" phase
+    of `trace`.
+    """
+
+    def __init__(self, stats=None, trace=None):
+        self.stats = stats
+        self.trace = trace
+        self._first_headers = {}  # content digest -> header of the first file with that content
+
+    def digest(self, content):
+        """content_digest(content), timed. Thread-safe, so the reader threads can hash ahead."""
+        start = time.perf_counter()
+        digest = content_digest(content)
+        if self.trace is not None:
+            self.trace.add("hash", time.perf_counter() - start)
+        return digest
+
+    def check(self, header, content, digest=None):
+        """Returns what to emit for this file (in output order): `content`, or the reference replacing it."""
+        if digest is None:
+            digest = self.digest(content)
+        first_header = self._first_headers.get(digest)
+        if first_header is None:
+            self._first_headers[digest] = header
+            return content
+        reference = duplicate_reference(first_header)
+        if len(reference) >= len(content):
+            return content
+        if self.stats is not None:
+            self.stats.duplicate_count += 1
+            self.stats.duplicate_bytes_saved += (len(content.encode('utf-8', 'surrogatepass'))
+                                                 - len(reference.encode('utf-8')))
+        return reference
+
+
+class TokenBudget:
+    """
+    Caps the output at `max_tokens` estimated tokens (CHARS_PER_TOKEN
+    characters each), counting headers, separators and the instructions
+    suffix, which is reserved up front and always emitted.
+
+    Files are admitted in output order. The first one that does not fit is
+    left out, or with `truncate` cut at a line boundary and ended with
+    TRUNCATION_MARKER; either way the budget is then `exhausted` and every
+    later file is left out.
+    """
+
+    def __init__(self, max_tokens, truncate=False, instructions=""):
+        self.max_chars = max(0, max_tokens) * CHARS_PER_TOKEN
+        self.truncate = truncate
+        self.used_chars = len(APPENDED_INSTRUCTIONS_HEADER) + len(instructions) if instructions else 0
+        self.exhausted = False
+        self._files = 0
+
+    def admit(self, header, content):
+        """Returns what to emit for the next file: `content`, a truncated copy, or None if it is left out."""
+        if self.exhausted:
+            return None
+        overhead = (len(FILE_SEPARATOR) if self._files else 0) + len(header)
+        room = self.max_chars - self.used_chars - overhead
+        if len(content) > room:
+            self.exhausted = True
+            content = self._truncated(content, room) if self.truncate else None
+            if content is None:
+                return None
+        self._files += 1
+        self.used_chars += overhead + len(content)
+        # Stop as soon as not even an empty file's header would fit, so nothing more is read for nothing.
+        if self.max_chars - self.used_chars < len(FILE_SEPARATOR) + len(FILE_HEADER_PREFIX) + len(FILE_HEADER_SUFFIX):
+            self.exhausted = True
+        return content
+
+    @staticmethod
+    def _truncated(content, room):
+        room -= len(TRUNCATION_MARKER)
+        if room < 2:  # Not even one character and its newline.
+            return None
+        cut = content.rfind('\n', 0, room) + 1
+        kept = content[:cut] if cut else content[:room - 1] + '\n'
+        return kept + TRUNCATION_MARKER
+
+
+def admit_file(file_path, header, content, stats=None, duplicates=None, token_budget=None, digest=None):
+    """
+    The step between reading a text file and emitting it, in output order:
+    deduplication, then the token budget. Returns what to emit (`content`, a
+    duplicate reference or a truncated copy), or None if the budget leaves
+    the file out; the verdict goes to `stats` (files_processed_count,
+    budget_left_out, budget_truncated_file). Fresh drops and watch mode both
+    go through here, so their output cannot drift apart.
+    """
+    if duplicates is not None:
+        content = duplicates.check(header, content, digest)
+    if token_budget is not None:
+        admitted = token_budget.admit(header, content)
+        if admitted is None:
+            if stats is not None:
+                stats.budget_left_out.append(file_path)
+            return None
+        if admitted is not content and stats is not None:
+            stats.budget_truncated_file = file_path
+        content = admitted
+    if stats is not None:
+        stats.files_processed_count += 1
+    return content
+
+
+def assemble_chunks(files, instructions="", cancel_event=None):
+    """Turns (header, content) pairs into the output chunks: separators between files, instructions last."""
+    has_content = False
+    for header, content in files:
+        if has_content:
+            yield FILE_SEPARATOR
+        yield header
+        yield content
+        has_content = True
+    if instructions and not _is_cancelled(cancel_event):
+        yield APPENDED_INSTRUCTIONS_HEADER if has_content else INSTRUCTIONS_ONLY_HEADER
+        yield instructions
+
+
+def concat_paths(paths, instructions="", **kwargs):
+    """Convenience wrapper returning (text, stats) for the whole output."""
+    stats = kwargs.pop("stats", None) or ConcatStats()
+    text = "".join(iter_concat_chunks(paths, instructions, stats=stats, **kwargs))
+    return text, stats
+
+
+class OutputSpool:
+    """
+    Holds one concatenation result without requiring it to fit in memory.
+
+    Chunks are written as they are produced; the text stays in memory up to
+    `max_memory` bytes and is moved to a temporary file beyond that. `save_to`
+    streams the result to a file through a fixed `buffer_size` buffer, and
+    `iter_chunks` hands it out piece by piece (for the clipboard).
+    """
+
+    def __init__(self, max_memory=SPOOL_MAX_MEMORY, buffer_size=OUTPUT_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self.char_count = 0
+        self._file = tempfile.SpooledTemporaryFile(
+            max_size=max_memory, mode='w+', buffering=buffer_size, encoding='utf-8', newline='',
+            prefix="ClipboardConcat_",
+        )
+
+    def write(self, chunk):
+        self._file.write(chunk)
+        self.char_count += len(chunk)
+
+    def save_to(self, file_path):
+        """Writes the whole result to `file_path` (UTF-8) without loading it into memory."""
+        self._file.seek(0)
+        with open(file_path, 'w', encoding='utf-8', buffering=self.buffer_size) as out:
+            shutil.copyfileobj(self._file, out, self.buffer_size)
+        self._file.seek(0, os.SEEK_END)
+
+    def read_text(self):
+        self._file.seek(0)
+        text = self._file.read()
+        self._file.seek(0, os.SEEK_END)
+        return text
+
+    def iter_chunks(self, chunk_chars=None):
+        """Yields the result in pieces of `chunk_chars` characters (default: buffer_size)."""
+        position = 0
+        try:
+            while True:
+                self._file.seek(position)
+                chunk = self._file.read(chunk_chars or self.buffer_size)
+                if not chunk:
+                    return
+                position = self._file.tell()
+                yield chunk
+        finally:
+            if not self._file.closed:
+                self._file.seek(0, os.SEEK_END)
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,271 @@
+"""
+Turning a drag-and-drop payload into the list of paths to collect.
+
+tkinterdnd2 delivers the dropped items as one Tcl list: items are separated
+by whitespace, and items containing spaces are wrapped in braces (`{/a b/c}`)
+or, less often, escaped with backslashes. `parse_drop_data` splits it in one
+pass with Tcl's list rules (the app passes Tk's own `splitlist`;
+`split_tcl_list` is the same in pure Python). Payloads that are not a valid
+list (NUL-separated, or paths with unescaped spaces) are handled by linear
+fallbacks.
+
+`resolve_drop_paths` then makes the set of items canonical: absolute and
+normalized, existing, each item once, and nothing inside another dropped
+folder, since the folder's walk already covers it. Existence and type checks
+are batched: directories holding several dropped items are listed once
+instead of stat'ing every item.
+"""
+import os
+import re
+
+# Tcl's list separators (TclFindElement's whitespace).
+_TCL_SPACE = " \t\n\v\f\r"
+_BRACE_CHARS = re.compile(r"[{}\\]")
+_BARE_END = re.compile(r"[ \t\n\v\f\r]|\\")
+_QUOTE_END = re.compile(r'["\\]')
+_BACKSLASH_CHARS = {"a": "\a", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t", "v": "\v"}
+# Escapes with digits: \o, \oo or \ooo octal, \xhh, \uhhhh and \Uhhhhhhhh (at most that many digits).
+_OCTAL_ESCAPE = re.compile(r"[0-7]{1,3}")
+_HEX_ESCAPE = re.compile(r"[0-9A-Fa-f]{1,8}")
+_HEX_DIGITS = {"x": 2, "u": 4, "U": 8}
+
+# A parent directory holding at least this many dropped items is listed once
+# with os.scandir; fewer items are stat'ed one by one.
+LIST_DIR_MIN_ITEMS = 2
+# Longer candidates cannot name a file (PATH_MAX on Linux); stops runs of words
+# that never match from growing without bound.
+MAX_PATH_CHARS = 4096
+
+
+def split_tcl_list(data):
+    """
+    Splits a Tcl list like Tcl_SplitList does, in linear time: braced items
+    are taken literally (nested braces balanced), quoted and bare items get
+    Tcl's backslash substitution (\\n, \\t, ..., \\101 octal, \\x41, \\u00e9 and
+    \\U0001f600 hex, \\<newline> is a space, \\<char> is the char; a trailing
+    lone backslash is kept). Raises ValueError for text that is not a
+    well-formed list.
+    """
+    items = []
+    i, n = 0, len(data)
+    while True:
+        while i < n and data[i] in _TCL_SPACE:
+            i += 1
+        if i >= n:
+            return items
+        if data[i] == '{':
+            end = _braced_end(data, i + 1)
+            items.append(data[i + 1:end])
+            i = end + 1
+        elif data[i] == '"':
+            item, i = _substituted(data, i + 1, _QUOTE_END, '"')
+            items.append(item)
+            i += 1
+        else:
+            item, i = _substituted(data, i, _BARE_END, None)
+            items.append(item)
+        if i < n and data[i] not in _TCL_SPACE:
+            raise ValueError("list element followed by garbage instead of a space")
+
+
+def _braced_end(data, start):
+    """Index of the brace closing the one just before `start` (escaped braces do not count)."""
+    depth, i = 1, start
+    while True:
+        match = _BRACE_CHARS.search(data, i)
+        if match is None:
+            raise ValueError("unmatched open brace in list")
+        i = match.end()
+        c = match.group()
+        if c == '\\':
+            i += 1
+        elif c == '{':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return match.start()
+
+
+def _substituted(data, i, end_pattern, terminator):
+    """Reads a quoted (terminator '"') or bare item from `i`; returns (item, index of its end)."""
+    parts = []
+    while True:
+        match = end_pattern.search(data, i)
+        if match is None:
+            if terminator is not None:
+                raise ValueError("unmatched open quote in list")
+            parts.append(data[i:])
+            return "".join(parts), len(data)
+        parts.append(data[i:match.start()])
+        if match.group() != '\\':
+            return "".join(parts), match.start()
+        text, i = _backslash(data, match.start() + 1)
+        parts.append(text)
+
+
+def _backslash(data, i):
+    """Substitutes the backslash sequence after the backslash at `i - 1`; returns (text, index after it)."""
+    escaped = data[i:i + 1]
+    if not escaped:
+        return '\\', i
+    if escaped == '\n':
+        i += 1
+        while i < len(data) and data[i] in ' \t':
+            i += 1
+        return ' ', i
+    if escaped in _HEX_DIGITS:
+        digits = _HEX_ESCAPE.match(data, i + 1, i + 1 + _HEX_DIGITS[escaped])
+        if digits is None:
+            return escaped, i + 1
+        # Like TclParseHex, stop before a digit that would go past U+10FFFF.
+        value, end = 0, digits.start()
+        while end < digits.end() and value <= 0x10FFF:
+            value = value * 16 + int(data[end], 16)
+            end += 1
+        return chr(value), end
+    digits = _OCTAL_ESCAPE.match(data, i)
+    if digits is not None:
+        # A third digit only while the value stays within a byte (\\377).
+        end = digits.end() if data[i] < "4" else min(digits.end(), i + 2)
+        return chr(int(data[digits.start():end], 8)), end
+    return _BACKSLASH_CHARS.get(escaped, escaped), i + 1
+
+
+class _PathIndex:
+    """
+    Answers "does this path exist, and is it a directory?" with as few system
+    calls as possible: from one os.scandir listing per parent directory where
+    that pays off (see LIST_DIR_MIN_ITEMS), with os.stat otherwise.
+    """
+
+    def __init__(self):
+        self._listings = {}  # parent directory -> {normcase(name): is_dir}, or None if it cannot be listed
+        self._batched = set()
+
+    def batch(self, paths):
+        """Marks parents holding several of `paths` for listing."""
+        counts = {}
+        for path in paths:
+            parent = os.path.dirname(path)
+            counts[parent] = counts.get(parent, 0) + 1
+        self._batched.update(parent for parent, count in counts.items() if count >= LIST_DIR_MIN_ITEMS)
+
+    def lookup(self, path, listing_only=False):
+        """None if `path` does not exist, else whether it is a directory (following symlinks)."""
+        parent, name = os.path.split(path)
+        if name and (listing_only or parent in self._batched):
+            listing = self._listing(parent)
+            if listing is not None:
+                return listing.get(os.path.normcase(name))
+        try:
+            return os.path.isdir(path) if os.path.exists(path) else None
+        except (OSError, ValueError):  # ValueError: embedded NUL byte.
+            return None
+
+    def _listing(self, parent):
+        if parent not in self._listings:
+            listing = None
+            try:
+                listing = {}
+                with os.scandir(parent or os.curdir) as entries:
+                    for entry in entries:
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+                        listing[os.path.normcase(entry.name)] = is_dir
+            except (OSError, ValueError):
+                listing = None
+            self._listings[parent] = listing
+        return self._listings[parent]
+
+
+def parse_drop_data(data, splitlist=split_tcl_list):
+    """
+    The items of a drop payload, as strings (not yet checked or normalized).
+
+    `splitlist` splits a Tcl list; in the app it is Tk's own (`widget.tk.splitlist`).
+    """
+    data = data.strip()
+    if not data:
+        return []
+    if '\0' in data:
+        return [item.strip() for item in data.split('\0') if item.strip()]
+    try:
+        items = list(splitlist(data))
+    except Exception:  # ValueError from split_tcl_list, tkinter.TclError from Tk's splitlist
+        items = None
+    if items is not None and ('{' in data or '\\' in data or len(items) <= 1):
+        return items
+    # Bare items separated by spaces: either a proper list or paths whose
+    # spaces were not escaped at all.
+    index = _PathIndex()
+    if items is not None and all(index.lookup(os.path.abspath(item), listing_only=True) is not None for item in items):
+        return items
+    return _join_unescaped(data, index)
+
+
+def _join_unescaped(data, index):
+    """
+    Splits paths whose spaces were not escaped, in one pass: words are joined
+    until the text so far names an existing entry (the shortest match wins).
+    Every check is a lookup in a cached directory listing.
+    """
+    if index.lookup(os.path.abspath(data), listing_only=True) is not None:
+        return [data]
+    paths, candidate = [], None
+    for word in data.split(' '):
+        candidate = word if candidate is None or len(candidate) > MAX_PATH_CHARS else f"{candidate} {word}"
+        if candidate and index.lookup(os.path.abspath(candidate), listing_only=True) is not None:
+            paths.append(candidate)
+            candidate = None
+    return paths
+
+
+def resolve_drop_paths(items):
+    """
+    Canonical paths to collect for the dropped `items`, in drop order, and
+    the number of items left out as redundant.
+
+    Paths are made absolute and normalized; items that do not exist are
+    dropped (not counted), and an item listed twice, or lying inside another
+    dropped folder, is kept only once: its folder's walk covers it (and
+    applies that folder's .gitignore rules to it).
+    """
+    paths = [os.path.abspath(item.strip()) for item in items if item.strip()]
+    index = _PathIndex()
+    index.batch(paths)
+
+    unique, seen, dirs = [], set(), set()
+    existing = 0
+    for path in paths:
+        key = os.path.normcase(path)
+        if key in seen:
+            existing += 1
+            continue
+        is_dir = index.lookup(path)
+        if is_dir is None:
+            continue
+        existing += 1
+        seen.add(key)
+        unique.append((path, key))
+        if is_dir:
+            dirs.add(key)
+
+    if dirs:
+        covered = {}  # directory -> whether it is or lies inside a dropped folder; shared by siblings
+        unique = [(path, key) for path, key in unique if not _covered(key, dirs, covered)]
+    kept = [path for path, _ in unique]
+    return kept, existing - len(kept)
+
+
+def _covered(key, dirs, memo):
+    """Whether `key` lies inside one of `dirs`."""
+    parent = os.path.dirname(key)
+    if parent == key:
+        return False
+    covered = memo.get(parent)
+    if covered is None:
+        covered = memo[parent] = parent in dirs or _covered(parent, dirs, memo)
+    return covered
@@ -0,0 +1,268 @@
+"""Hierarchical .gitignore matching for a single topdown directory walk."""
+import functools
+import importlib.util
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# pathspec is only imported when a .gitignore actually has to be compiled
+# (see _compile_gitignore); trees whose .gitignore files are all in the spec
+# cache never load it.
+_PATHSPEC_SPEC = importlib.util.find_spec("pathspec")
+PATHSPEC_AVAILABLE = _PATHSPEC_SPEC is not None
+
+logger = logging.getLogger(__name__)
+
+# Tails of pathspec's compiled gitwildmatch regexes: "the path or anything below it"
+# and the directory-only form used for patterns with a trailing '/'.
+_PS_ANY_SUFFIX = '(?:(?P<ps_d>/).*)?$'
+_PS_DIR_SUFFIX = '(?P<ps_d>/).*$'
+# Head of patterns without a slash ('*.log', '**/build'), which match the last
+# path component at any depth.
+_PS_ANY_DIR_PREFIX = '^(?:.+/)?'
+
+# Version of the stored pattern format (the regex rewriting in
+# _compile_gitignore). Bump it when that rewriting changes; stored patterns
+# of another format, or compiled by another pathspec installation, are
+# compiled again (see spec_format).
+SPEC_FORMAT_VERSION = 1
+
+# Compiled .gitignore files are kept for the whole process (and, given a
+# store, on disk), keyed by path and validated against (inode, size,
+# mtime_ns, spec_format()), so dropping an unchanged tree again parses and compiles nothing.
+SPEC_CACHE_MAX_ENTRIES = 4096
+# Files modified this recently are not cached, here (.gitignore files) or in
+# the content cache: another write within the same mtime tick could leave
+# size and mtime unchanged (the "racy" case git also guards against).
+RACY_WINDOW_NS = 2 * 10**9
+
+_spec_cache = OrderedDict()  # path -> ((inode, size, mtime_ns, spec format), patterns)
+_spec_cache_lock = threading.Lock()
+
+
+class GitignoreRules:
+    """
+    Hierarchical .gitignore rules for one dropped folder, filled in during a
+    single topdown os.walk.
+
+    Every .gitignore is compiled on its own and matched against paths relative
+    to the directory that contains it, like git does. Rules from deeper
+    .gitignore files take precedence over their parents, and within one file
+    the last matching pattern wins, so negations (`!pattern`) and anchored
+    patterns (`/pattern`, `dir/pattern`) behave as in `git check-ignore`.
+
+    Compiled files come from a process-wide cache (see SPEC_CACHE_MAX_ENTRIES);
+    `store`, if given, is a persistent second level with
+    `get_ignore_patterns(path, key)` / `put_ignore_patterns(path, key, patterns)`
+    (clipboardconcat.cache.ContentCache implements both).
+    """
+
+    def __init__(self, root_dir, store=None):
+        self.root_dir = root_dir
+        self.store = store
+        # rel dir ('' for the root, '/'-separated) -> tuple of (rel base dir, patterns)
+        # for every .gitignore that applies to entries of that directory.
+        self._chains = {}
+        # rel dir -> that chain prepared for matching names inside the directory,
+        # built once and shared by all its entries.
+        self._matchers = {}
+
+    def relative_dir(self, dir_full_path):
+        """'/'-separated path of a directory relative to the root ('' for the root itself)."""
+        rel_dir = os.path.relpath(dir_full_path, self.root_dir)
+        return '' if rel_dir == '.' else rel_dir.replace(os.sep, '/')
+
+    def enter_dir(self, dir_full_path, filenames):
+        """
+        Registers a directory reached by the walk and returns its relative_dir().
+
+        Entering a directory again re-reads its .gitignore; its subdirectories
+        must then be entered again too, since they inherit its rules.
+        """
+        rel_dir = self.relative_dir(dir_full_path)
+        chain = self._chains.get(rel_dir.rpartition('/')[0], ()) if rel_dir else ()
+        if '.gitignore' in filenames:
+            patterns = self._load_patterns(os.path.join(dir_full_path, '.gitignore'))
+            if patterns:
+                chain = chain + ((rel_dir, patterns),)
+        self._chains[rel_dir] = chain
+        self._matchers.pop(rel_dir, None)
+        return rel_dir
+
+    def is_ignored(self, rel_dir, name, is_dir=False):
+        """Checks `name` inside the already entered directory `rel_dir`."""
+        matcher = self._matchers.get(rel_dir)
+        if matcher is None:
+            matcher = self._matchers[rel_dir] = self._build_matcher(rel_dir)
+        for prefix, patterns in matcher:
+            for regex, name_only, include, dir_only in patterns:
+                if (is_dir or not dir_only) and regex.match(name if name_only else prefix + name):
+                    return include
+        return False
+
+    def _build_matcher(self, rel_dir):
+        """
+        The chain of `rel_dir`, deepest .gitignore first and each file's
+        patterns last-first, with the directory's path relative to every
+        .gitignore worked out once instead of for every name.
+        """
+        matcher = []
+        for base_dir, patterns in reversed(self._chains.get(rel_dir, ())):
+            if not rel_dir or rel_dir == base_dir:
+                prefix = ''
+            else:
+                prefix = (rel_dir[len(base_dir) + 1:] if base_dir else rel_dir) + '/'
+            matcher.append((prefix, patterns[::-1]))
+        return matcher
+
+    def _load_patterns(self, gitignore_full_path):
+        try:
+            st = os.stat(gitignore_full_path)
+        except OSError as e:
+            logger.warning("Failed to read/process %s, its rules are not applied: %s", gitignore_full_path, e)
+            return []
+        key = (st.st_ino, st.st_size, st.st_mtime_ns, spec_format())
+        cacheable = time.time_ns() - st.st_mtime_ns > RACY_WINDOW_NS
+        if cacheable:
+            with _spec_cache_lock:
+                cached = _spec_cache.get(gitignore_full_path)
+                if cached is not None and cached[0] == key:
+                    _spec_cache.move_to_end(gitignore_full_path)
+                    return cached[1]
+            if self.store is not None:
+                sources = self.store.get_ignore_patterns(gitignore_full_path, key)
+                if sources is not None:
+                    patterns = [(re.compile(regex), name_only, include, dir_only)
+                                for regex, name_only, include, dir_only in sources]
+                    _remember_patterns(gitignore_full_path, key, patterns)
+                    return patterns
+
+        patterns = _compile_gitignore(gitignore_full_path)
+        if patterns is None:
+            return []
+        if cacheable:
+            _remember_patterns(gitignore_full_path, key, patterns)
+            if self.store is not None:
+                self.store.put_ignore_patterns(gitignore_full_path, key, [
+                    (regex.pattern, name_only, include, dir_only) for regex, name_only, include, dir_only in patterns
+                ])
+        return patterns
+
+
+def _remember_patterns(gitignore_full_path, key, patterns):
+    with _spec_cache_lock:
+        _spec_cache[gitignore_full_path] = (key, patterns)
+        _spec_cache.move_to_end(gitignore_full_path)
+        while len(_spec_cache) > SPEC_CACHE_MAX_ENTRIES:
+            _spec_cache.popitem(last=False)
+
+
+@functools.lru_cache(maxsize=None)
+def spec_format():
+    """
+    Identifies what produced a compiled .gitignore: SPEC_FORMAT_VERSION and
+    the installed pathspec, fingerprinted by the size and mtime of its module
+    file so that checking it neither imports pathspec nor its metadata. Part
+    of every cache key, so an upgrade of either never serves stale regexes.
+    """
+    try:
+        st = os.stat(_PATHSPEC_SPEC.origin)
+        installed = f"{st.st_size}:{st.st_mtime_ns}"
+    except (AttributeError, TypeError, OSError):  # Not installed, or not a plain file.
+        installed = "unknown"
+    return f"{SPEC_FORMAT_VERSION}/pathspec:{installed}"
+
+
+def clear_spec_cache():
+    """Forgets every compiled .gitignore held in memory."""
+    with _spec_cache_lock:
+        _spec_cache.clear()
+
+
+def _name_only_regex(regex):
+    """
+    For a regex of the form '^(?:.+/)?X$' where X cannot match a '/', returns
+    '^X$': such a pattern matches exactly when X matches the last path
+    component, which is cheaper than matching the whole path. None otherwise.
+    """
+    if not regex.startswith(_PS_ANY_DIR_PREFIX):
+        return None
+    rest = regex[len(_PS_ANY_DIR_PREFIX):]
+    i = 0
+    while i < len(rest):
+        c = rest[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '[' and rest.startswith('[^/]', i):
+            i += 4
+            continue
+        if c == '[' and rest[i + 1:i + 2] not in ('^', ']', '\\'):
+            end = rest.find(']', i + 1)
+            if end < 0 or '/' in rest[i:end]:
+                return None
+            i = end + 1
+            continue
+        if c in '/.(|[':  # A literal slash, an any-char, or a construct we don't analyse.
+            return None
+        i += 1
+    return '^' + rest
+
+
+@functools.lru_cache(maxsize=None)
+def _check_pathspec_layout():
+    """
+    Logs an error (once) if pathspec no longer compiles patterns into the
+    regexes _compile_gitignore rewrites; ignore results would then differ from
+    git's (see tests/test_ignore.py).
+    """
+    import pathspec
+
+    def regex(line):
+        return pathspec.patterns.GitWildMatchPattern(line).regex.pattern
+
+    if not (regex('build').endswith(_PS_ANY_SUFFIX) and regex('build/').endswith(_PS_DIR_SUFFIX)
+            and regex('*.log').startswith(_PS_ANY_DIR_PREFIX)):
+        logger.error(
+            "pathspec %s compiles .gitignore patterns differently than expected; "
+            "files below ignored-then-re-included directories may be matched wrongly",
+            getattr(pathspec, "__version__", "(unknown version)"),
+        )
+
+
+def _compile_gitignore(gitignore_full_path):
+    """[(regex, name_only, include, dir_only)] for one .gitignore, or None if it cannot be read."""
+    import pathspec
+
+    _check_pathspec_layout()
+    try:
+        with open(gitignore_full_path, 'r', encoding='utf-8') as f_gi:
+            spec = pathspec.PathSpec.from_lines(pathspec.patterns.GitWildMatchPattern, f_gi)
+    except Exception as e:
+        logger.warning("Failed to read/process %s, its rules are not applied: %s", gitignore_full_path, e)
+        return None
+    patterns = []
+    for pattern in spec.patterns:
+        if pattern.include is None:  # Comments and blank lines compile to null patterns.
+            continue
+        # pathspec's regexes also match everything below a matched directory
+        # ('build' matches 'build/x.txt'). The walk prunes ignored directories
+        # instead, so each path is checked on its own, the way git does; that is
+        # what keeps '!*/' or '!keep.log' from re-including files of an excluded
+        # parent.
+        regex = pattern.regex.pattern
+        dir_only = False
+        if regex.endswith(_PS_ANY_SUFFIX):
+            regex = regex[:-len(_PS_ANY_SUFFIX)] + '$'
+        elif regex.endswith(_PS_DIR_SUFFIX):
+            regex = regex[:-len(_PS_DIR_SUFFIX)] + '$'
+            dir_only = True
+        name_regex = _name_only_regex(regex)
+        if name_regex is not None:
+            patterns.append((re.compile(name_regex), True, pattern.include, dir_only))
+        else:
+            patterns.append((re.compile(regex), False, pattern.include, dir_only))
+    return patterns
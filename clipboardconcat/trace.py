@@ -0,0 +1,106 @@
+"""
+Timing instrumentation for one drop (or one CLI run).
+
+A `DropTrace` is passed alongside the ConcatStats of a run. The core adds the
+time spent in each phase to it (walking directories, loading .gitignore
+files, matching names, reading, decoding and hashing files) and remembers the
+slowest files; clients add their own stages (collecting into the spool,
+clipboard transfer, saving). Read and decode times are summed over the reader threads,
+so with several workers they can exceed the wall time.
+
+`summary()` is the one-line form shown in the status line, `to_dict()` /
+`write_json()` the structured form written as a trace file.
+"""
+import heapq
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+SLOWEST_FILES = 10
+
+# Display order of the known phases; any other phase is listed after them.
+PHASE_ORDER = ("walk", "ignore", "match", "read", "decode", "hash", "collect", "clipboard", "save")
+
+
+class DropTrace:
+    def __init__(self, slowest_files=SLOWEST_FILES):
+        self.started_at = time.time()
+        self.phase_seconds = {}
+        self.slowest_files_kept = slowest_files
+        self._slowest = []  # min-heap of (seconds, path, size)
+        self._lock = threading.Lock()
+
+    def add(self, phase, seconds):
+        with self._lock:
+            self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def timed(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - start)
+
+    def record_file(self, file_path, seconds, size):
+        """Notes how long one file took to read, keeping only the slowest ones."""
+        with self._lock:
+            if len(self._slowest) < self.slowest_files_kept:
+                heapq.heappush(self._slowest, (seconds, file_path, size))
+            elif seconds > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, (seconds, file_path, size))
+
+    @property
+    def slowest_files(self):
+        """[(seconds, path, size)], slowest first."""
+        with self._lock:
+            return sorted(self._slowest, reverse=True)
+
+    def ordered_phases(self):
+        with self._lock:
+            phases = dict(self.phase_seconds)
+        known = [(name, phases.pop(name)) for name in PHASE_ORDER if name in phases]
+        return known + sorted(phases.items())
+
+    def summary(self):
+        """'Timing: walk 12 ms, match 3 ms, read 80 ms, ...' for status lines; '' when nothing was timed."""
+        phases = self.ordered_phases()
+        if not phases:
+            return ""
+        return "Timing: " + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in phases) + "."
+
+    def to_dict(self, stats=None):
+        trace = dict(
+            started_at=self.started_at,
+            phase_seconds=dict(self.ordered_phases()),
+            slowest_files=[dict(path=path, seconds=seconds, size=size) for seconds, path, size in self.slowest_files],
+        )
+        if stats is not None:
+            trace.update(
+                dirs_visited=stats.dirs_visited,
+                files_scanned=stats.files_scanned,
+                files_matched=stats.files_scanned - stats.git_ignored_count,
+                files_ignored=stats.git_ignored_count,
+                dirs_ignored=stats.git_ignored_dir_count,
+                files_processed=stats.files_processed_count,
+                skip_counts=dict(stats.skip_counts),
+                bytes_read=stats.bytes_read,
+                cache_hits=stats.cache_hits,
+                cache_misses=stats.cache_misses,
+                duplicate_files=stats.duplicate_count,
+                duplicate_bytes_saved=stats.duplicate_bytes_saved,
+                budget_truncated_file=stats.budget_truncated_file,
+                budget_left_out=list(stats.budget_left_out),
+                output_chars=stats.output_chars,
+                output_lines=stats.output_lines,
+                output_tokens=stats.output_tokens,
+            )
+        return trace
+
+    def write_json(self, file_path, stats=None, **extra):
+        trace = self.to_dict(stats)
+        trace.update(extra)
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(trace, f, indent=2)
+            f.write('\n')
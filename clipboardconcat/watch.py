@@ -0,0 +1,626 @@
+"""
+Watch mode: keep a concatenation up to date while the dropped files change.
+
+`IncrementalConcat` remembers the walk per directory (which files and
+subdirectories it kept, in walk order) and the read result of every file. A
+change then only costs what it touches: a modified file is re-read, a created
+or deleted entry re-lists its directory, and a `.gitignore` change re-walks
+the subtree it governs (unchanged files are reused, not re-read). Segments are
+assembled on demand, in the same order and format as a fresh drop.
+
+`WatchSession` feeds it changes from inotify on Linux, or from polling
+`os.stat` everywhere else.
+"""
+import ctypes
+import ctypes.util
+import functools
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .core import (
+    APPENDED_INSTRUCTIONS_HEADER, DEFAULT_READ_WORKERS, FILE_SEPARATOR, INSTRUCTIONS_ONLY_HEADER, OUTPUT_BUFFER_SIZE,
+    ConcatStats, DuplicateFilter, FileFilter, TokenBudget, admit_file, assemble_chunks, content_digest, file_header,
+    folder_file_header,
+)
+from .ignore import PATHSPEC_AVAILABLE, GitignoreRules
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_SECONDS = 1.0
+# Editors save in several steps (truncate, write, rename); events arriving
+# within this window are applied as one update.
+DEBOUNCE_SECONDS = 0.1
+
+
+def _stat_key(st):
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def _stat_key_of(path):
+    try:
+        return _stat_key(os.stat(path))
+    except OSError:
+        return None
+
+
+def _mtime_ns_of(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _list_dir(dir_path):
+    """(dirnames, filenames) split exactly like os.walk does, or None if the directory cannot be listed."""
+    dirs, filenames = [], []
+    try:
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                (dirs if is_dir else filenames).append(entry.name)
+    except OSError:
+        return None
+    return dirs, filenames
+
+
+def _is_within(path, top):
+    return path == top or path.startswith(top + os.sep)
+
+
+class _DirNode:
+    """What the walk kept from one directory, in walk order."""
+    __slots__ = ("files", "subdirs", "ignored_files", "ignored_dirs", "listed_files", "mtime_ns", "gitignore_key")
+
+
+class _FileEntry:
+    __slots__ = ("stat_key", "content", "skip_reason", "size", "newlines", "digest")
+
+    def __init__(self, stat_key, read_result, digest=None):
+        self.stat_key = stat_key
+        self.content, self.skip_reason, self.size = read_result
+        self.newlines = self.content.count('\n') if self.skip_reason is None else 0
+        self.digest = digest  # content_digest(content), when deduplicating
+
+
+class IncrementalConcat:
+    """
+    A concatenation result that can be patched as files change.
+
+    It offers the same interface as OutputSpool (`char_count`, `save_to`,
+    `read_text`, `iter_chunks`, `close`), so it can be handed to the same
+    output actions. With `dedup`, every file is hashed once when it is read
+    and duplicates are resolved whenever the output is assembled; likewise
+    `max_tokens` applies a TokenBudget to each assembly (all files are still
+    read, since any of them may come within the budget after a change).
+    All methods take `lock`; `WatchSession` applies changes under it.
+    """
+
+    def __init__(self, paths, instructions="", file_filter=None, cache=None, dedup=False, max_tokens=None,
+                 truncate_last=False):
+        self.paths = [os.path.normpath(p) for p in paths]
+        self.instructions = instructions
+        self.file_filter = file_filter or FileFilter()
+        self.cache = cache
+        self.dedup = dedup
+        self.max_tokens = max_tokens
+        self.truncate_last = truncate_last
+        self.lock = threading.RLock()
+        self.version = 0
+        self.last_update_time = None     # time.time() of the last applied change
+        self.last_update_seconds = None  # how long applying it took
+        self.last_update_reread = 0
+        self._cache_hits = self._cache_misses = 0
+        self.current_stats = ConcatStats()
+        self._dir_items = set()
+        self._rules = {}    # dropped folder -> GitignoreRules or None
+        self._nodes = {}    # (dropped folder, directory path) -> _DirNode
+        self._entries = {}  # file path -> _FileEntry, or None if it vanished
+
+    # --- building --------------------------------------------------------
+
+    def build(self, stats=None, cancel_event=None, read_workers=DEFAULT_READ_WORKERS, trace=None):
+        """
+        Initial full walk and read. Returns False if cancelled.
+
+        With a DropTrace, the whole walk (including .gitignore handling) goes
+        to its "walk" phase and reads are recorded as in iter_read_files.
+        """
+        stats = stats if stats is not None else ConcatStats()
+        with self.lock:
+            walk_start = time.perf_counter()
+            file_paths = []
+            for item in self.paths:
+                if cancel_event is not None and cancel_event.is_set():
+                    return False
+                if os.path.isfile(item):
+                    stats.files_scanned += 1
+                    file_paths.append(item)
+                elif os.path.isdir(item):
+                    self._dir_items.add(item)
+                    self._rules[item] = GitignoreRules(item, store=self.cache) if PATHSPEC_AVAILABLE else None
+                    file_paths.extend(self._scan_tree(item, item, stats))
+
+            if trace is not None:
+                trace.add("walk", time.perf_counter() - walk_start)
+
+            unique_paths = list(dict.fromkeys(file_paths))
+            load = functools.partial(self._load_entry, trace=trace)
+            with ThreadPoolExecutor(max_workers=max(1, read_workers), thread_name_prefix="ClipboardConcat-watch") as executor:
+                for file_path, loaded in zip(unique_paths, executor.map(load, unique_paths)):
+                    if cancel_event is not None and cancel_event.is_set():
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        return False
+                    self._entries[file_path] = entry = self._count_cache_use(loaded)
+                    if entry is not None and entry.skip_reason is None:
+                        stats.files_processed_count += 1
+                        stats.bytes_read += entry.size
+            if self.cache is not None:
+                self.cache.commit()
+            self._refresh_stats()
+            self.version += 1
+            return True
+
+    def _scan_tree(self, item, top, stats=None):
+        """Walks `top` (inside the dropped folder `item`), records its nodes and returns the kept file paths."""
+        found = []
+        for current_root, dirs, filenames in os.walk(top, topdown=True):
+            if stats is not None:
+                stats.dirs_visited += 1
+                stats.files_scanned += len(filenames)
+            node = self._make_node(item, current_root, dirs, filenames, enter=True)
+            dirs[:] = [os.path.basename(d) for d in node.subdirs]
+            found.extend(node.files)
+        return found
+
+    def _make_node(self, item, dir_path, dirs, filenames, enter):
+        rules = self._rules.get(item)
+        if '.git' in dirs: dirs.remove('.git')
+        rel_root = None
+        if rules:
+            rel_root = rules.enter_dir(dir_path, filenames) if enter else rules.relative_dir(dir_path)
+        node = _DirNode()
+        node.ignored_dirs = node.ignored_files = 0
+        kept_dirs = []
+        for dirname in dirs:
+            if rules and rules.is_ignored(rel_root, dirname, is_dir=True):
+                node.ignored_dirs += 1
+            else:
+                kept_dirs.append(os.path.join(dir_path, dirname))
+        # os.walk lists symlinked directories but does not descend into them.
+        node.subdirs = [d for d in kept_dirs if not os.path.islink(d)]
+        node.files = []
+        for filename in filenames:
+            if rules and rules.is_ignored(rel_root, filename):
+                node.ignored_files += 1
+            else:
+                node.files.append(os.path.join(dir_path, filename))
+        node.listed_files = len(filenames)
+        node.mtime_ns = _mtime_ns_of(dir_path)
+        node.gitignore_key = _stat_key_of(os.path.join(dir_path, '.gitignore')) if '.gitignore' in filenames else None
+        self._nodes[(item, dir_path)] = node
+        return node
+
+    def _load_entry(self, file_path, trace=None):
+        """Returns (entry or None if the file is gone, cache_hit). Safe to call from pool threads."""
+        start = time.perf_counter()
+        try:
+            stat_key = _stat_key(os.stat(file_path))
+        except OSError:
+            return None, None
+        if self.cache is not None:
+            read_result, cache_hit = self.cache.read(self.file_filter, file_path, trace=trace)
+        else:
+            read_result, cache_hit = self.file_filter.read(file_path, trace=trace), None
+        if trace is not None:
+            trace.record_file(file_path, time.perf_counter() - start, read_result[2])
+        digest = None
+        if self.dedup and read_result[1] is None:
+            start = time.perf_counter()
+            digest = content_digest(read_result[0])
+            if trace is not None:
+                trace.add("hash", time.perf_counter() - start)
+        return _FileEntry(stat_key, read_result, digest), cache_hit
+
+    def _count_cache_use(self, loaded):
+        entry, cache_hit = loaded
+        if cache_hit is not None:
+            if cache_hit:
+                self._cache_hits += 1
+            else:
+                self._cache_misses += 1
+        return entry
+
+    def _refresh_entry(self, file_path):
+        """Re-reads `file_path` if its stat key changed. Returns True if it was read."""
+        old = self._entries.get(file_path)
+        if old is not None and old.stat_key == _stat_key_of(file_path):
+            return False
+        self._entries[file_path] = entry = self._count_cache_use(self._load_entry(file_path))
+        return entry is not None
+
+    # --- incremental updates ---------------------------------------------
+
+    def apply_changes(self, changed_files=(), changed_dirs=()):
+        """
+        Patches the result for files whose content changed and directories
+        whose listing changed (entries created, deleted or renamed).
+        """
+        start = time.perf_counter()
+        with self.lock:
+            rescans, relists, refresh = set(), set(), set()
+            for path in map(os.path.normpath, changed_files):
+                if os.path.basename(path) == '.gitignore':
+                    parent = os.path.dirname(path)
+                    rescans.update((item, parent) for item in self._dir_items if (item, parent) in self._nodes)
+                if path in self._entries:
+                    refresh.add(path)
+            for path in map(os.path.normpath, changed_dirs):
+                relists.update((item, path) for item in self._dir_items if (item, path) in self._nodes)
+                refresh.update(p for p in self.paths if os.path.dirname(p) == path and p not in self._dir_items)
+
+            reread = 0
+            structure_changed = bool(rescans or relists)
+            while relists:
+                item, dir_path = relists.pop()
+                reread += self._relist(item, dir_path, rescans, relists)
+            for item, top in sorted(rescans, key=lambda key: len(key[1])):
+                if (item, top) in self._nodes:  # Not already dropped by an enclosing rescan.
+                    reread += self._rescan(item, top)
+            for file_path in refresh:
+                reread += self._refresh_entry(file_path)
+            if structure_changed:
+                self._drop_unreferenced_entries()
+            if self.cache is not None:
+                self.cache.commit()
+
+            self._refresh_stats()
+            self.version += 1
+            self.last_update_reread = reread
+            self.last_update_time = time.time()
+            self.last_update_seconds = time.perf_counter() - start
+            return self.last_update_seconds
+
+    def _relist(self, item, dir_path, rescans, relists):
+        old = self._nodes.get((item, dir_path))
+        if old is None:
+            return 0
+        listing = _list_dir(dir_path)
+        if listing is None:  # The directory itself is gone; its parent's listing says so.
+            parent = os.path.dirname(dir_path)
+            self._drop_nodes(item, dir_path)
+            if (item, parent) in self._nodes:
+                relists.add((item, parent))
+            return 0
+        dirs, filenames = listing
+        gitignore_key = _stat_key_of(os.path.join(dir_path, '.gitignore')) if '.gitignore' in filenames else None
+        if gitignore_key != old.gitignore_key:
+            rescans.add((item, dir_path))
+            return 0
+
+        node = self._make_node(item, dir_path, dirs, filenames, enter=False)
+        reread = 0
+        old_subdirs = set(old.subdirs)
+        for subdir in node.subdirs:
+            if subdir not in old_subdirs:
+                for file_path in self._scan_tree(item, subdir):
+                    reread += self._refresh_entry(file_path)
+        for subdir in old_subdirs.difference(node.subdirs):
+            self._drop_nodes(item, subdir)
+        old_files = set(old.files)
+        for file_path in node.files:
+            if file_path not in old_files:
+                reread += self._refresh_entry(file_path)
+        return reread
+
+    def _rescan(self, item, top):
+        """Re-walks `top` with fresh .gitignore rules, re-reading only files that changed."""
+        if not os.path.isdir(top):
+            self._drop_nodes(item, top)
+            return 0
+        self._drop_nodes(item, top)
+        return sum(self._refresh_entry(file_path) for file_path in self._scan_tree(item, top))
+
+    def _drop_nodes(self, item, top):
+        for key in [key for key in self._nodes if key[0] == item and _is_within(key[1], top)]:
+            del self._nodes[key]
+
+    def _drop_unreferenced_entries(self):
+        referenced = {p for p in self.paths if p not in self._dir_items}
+        for node in self._nodes.values():
+            referenced.update(node.files)
+        for file_path in [p for p in self._entries if p not in referenced]:
+            del self._entries[file_path]
+
+    def poll_changes(self):
+        """Finds changes by comparing stat results (the fallback when inotify is not available)."""
+        changed_files, changed_dirs = set(), set()
+        with self.lock:
+            for (_, dir_path), node in list(self._nodes.items()):
+                if _mtime_ns_of(dir_path) != node.mtime_ns:
+                    changed_dirs.add(dir_path)
+                gitignore_path = os.path.join(dir_path, '.gitignore')
+                if _stat_key_of(gitignore_path) != node.gitignore_key:
+                    changed_files.add(gitignore_path)
+            for file_path, entry in list(self._entries.items()):
+                stat_key = _stat_key_of(file_path)
+                if entry is None or stat_key != entry.stat_key:
+                    changed_files.add(file_path)
+                    if stat_key is None:
+                        changed_dirs.add(os.path.dirname(file_path))
+        return changed_files, changed_dirs
+
+    def watched_dirs(self):
+        with self.lock:
+            dirs = {dir_path for _, dir_path in self._nodes}
+            dirs.update(os.path.dirname(p) for p in self.paths if p not in self._dir_items)
+            return dirs
+
+    # --- output ----------------------------------------------------------
+
+    def _iter_entries(self):
+        """Yields (file path, header, entry) in the order a fresh drop would read the files."""
+        for item in self.paths:
+            if item not in self._dir_items:
+                if item in self._entries:
+                    yield item, file_header(item), self._entries[item]
+                continue
+            stack = [item]
+            while stack:
+                node = self._nodes.get((item, stack.pop()))
+                if node is None:
+                    continue
+                for file_path in node.files:
+                    yield file_path, folder_file_header(item, file_path), self._entries.get(file_path)
+                stack.extend(reversed(node.subdirs))
+
+    def _token_budget(self):
+        return TokenBudget(self.max_tokens, self.truncate_last, self.instructions) if self.max_tokens is not None else None
+
+    def _iter_files(self):
+        duplicates = DuplicateFilter() if self.dedup else None
+        token_budget = self._token_budget()
+        for file_path, header, entry in self._iter_entries():
+            if entry is not None and entry.skip_reason is None:
+                content = admit_file(file_path, header, entry.content, None, duplicates, token_budget, entry.digest)
+                if content is None:
+                    return  # The budget is used up; every later file is left out too.
+                yield header, content
+
+    def iter_chunks(self):
+        with self.lock:
+            yield from assemble_chunks(self._iter_files(), self.instructions)
+
+    def _refresh_stats(self):
+        """Recomputes the counters from the per-file records, without touching file contents."""
+        stats = ConcatStats()
+        stats.cache_hits, stats.cache_misses = self._cache_hits, self._cache_misses
+        duplicates = DuplicateFilter(stats) if self.dedup else None
+        token_budget = self._token_budget()
+        last_piece = ""
+        stats.dirs_visited = len(self._nodes)
+        for node in self._nodes.values():
+            stats.files_scanned += node.listed_files
+            stats.git_ignored_count += node.ignored_files
+            stats.git_ignored_dir_count += node.ignored_dirs
+        stats.files_scanned += sum(1 for p in self.paths if p not in self._dir_items and self._entries.get(p) is not None)
+        for file_path, header, entry in self._iter_entries():
+            if entry is None:
+                continue
+            if token_budget is not None and token_budget.exhausted:
+                # Counted like a fresh drop, which stops reading here.
+                stats.count_left_out(file_path, self.file_filter)
+                continue
+            if entry.skip_reason is not None:
+                stats.count_skip(entry.skip_reason)
+                continue
+            stats.bytes_read += entry.size
+            content = admit_file(file_path, header, entry.content, stats, duplicates, token_budget, entry.digest)
+            if content is None:
+                continue
+            newlines = entry.newlines if content is entry.content else content.count('\n')
+            if stats.files_processed_count > 1:
+                stats.output_chars += len(FILE_SEPARATOR)
+                stats.output_newlines += FILE_SEPARATOR.count('\n')
+            stats.output_chars += len(header) + len(content)
+            stats.output_newlines += 1 + newlines
+            last_piece = content or header
+        if self.instructions:
+            suffix_header = APPENDED_INSTRUCTIONS_HEADER if stats.files_processed_count else INSTRUCTIONS_ONLY_HEADER
+            stats.output_chars += len(suffix_header) + len(self.instructions)
+            stats.output_newlines += suffix_header.count('\n') + self.instructions.count('\n')
+            last_piece = self.instructions
+        stats.output_ends_with_newline = last_piece.endswith('\n') if last_piece else True
+        self.current_stats = stats
+
+    @property
+    def char_count(self):
+        return self.current_stats.output_chars
+
+    def save_to(self, file_path):
+        with open(file_path, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as out:
+            for chunk in self.iter_chunks():
+                out.write(chunk)
+
+    def read_text(self):
+        return "".join(self.iter_chunks())
+
+    def close(self):
+        with self.lock:
+            self._entries.clear()
+            self._nodes.clear()
+
+
+class WatchSession:
+    """
+    Background thread that applies file system changes to an IncrementalConcat.
+
+    Uses inotify on Linux and falls back to polling every `poll_interval`
+    seconds elsewhere (or when inotify watches cannot be added). `on_update`
+    is called on the watch thread after each applied change.
+    """
+
+    def __init__(self, model, on_update=None, poll_interval=POLL_INTERVAL_SECONDS, use_inotify=True):
+        self.model = model
+        self.on_update = on_update
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.backend_name = None
+        self.error = None
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ClipboardConcat-watch", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        backend = _InotifyBackend.create() if self.use_inotify else None
+        try:
+            if backend is not None and backend.sync(self.model.watched_dirs()):
+                self.backend_name = "inotify"
+                self._run_inotify(backend)
+            else:
+                self.backend_name = "polling"
+                self._run_polling()
+        except Exception as e:
+            logger.exception("Watch mode stopped")
+            self.error = e
+        finally:
+            if backend is not None:
+                backend.close()
+
+    def _run_polling(self):
+        while not self._stop_event.wait(self.poll_interval):
+            changed_files, changed_dirs = self.model.poll_changes()
+            if changed_files or changed_dirs:
+                self._apply(changed_files, changed_dirs)
+
+    def _run_inotify(self, backend):
+        while not self._stop_event.is_set():
+            changed_files, changed_dirs, overflow = backend.read(timeout=0.5)
+            if not (changed_files or changed_dirs or overflow):
+                continue
+            deadline = time.monotonic() + DEBOUNCE_SECONDS
+            while (remaining := deadline - time.monotonic()) > 0:
+                more_files, more_dirs, more_overflow = backend.read(timeout=remaining)
+                changed_files |= more_files
+                changed_dirs |= more_dirs
+                overflow = overflow or more_overflow
+            if overflow:  # Events were lost; compare everything instead.
+                changed_files, changed_dirs = self.model.poll_changes()
+            self._apply(changed_files, changed_dirs)
+            if not backend.sync(self.model.watched_dirs()):
+                self.backend_name = "polling"
+                self._run_polling()
+                return
+
+    def _apply(self, changed_files, changed_dirs):
+        self.model.apply_changes(changed_files, changed_dirs)
+        if self.on_update is not None:
+            self.on_update(self.model)
+
+
+class _InotifyBackend:
+    """Minimal inotify(7) binding through ctypes; one watch per walked directory."""
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    LISTING_EVENTS = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+    CONTENT_EVENTS = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE
+    WATCH_MASK = LISTING_EVENTS | CONTENT_EVENTS | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, libc, fd):
+        self._libc = libc
+        self._fd = fd
+        self._wd_to_path = {}
+        self._path_to_wd = {}
+
+    @classmethod
+    def create(cls):
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        return cls(libc, fd) if fd >= 0 else None
+
+    def sync(self, dirs):
+        """Watches exactly `dirs`. Returns False if the watch limit was hit."""
+        for path in set(self._path_to_wd).difference(dirs):
+            self._libc.inotify_rm_watch(self._fd, self._path_to_wd.pop(path))
+        for path in dirs:
+            if path in self._path_to_wd:
+                continue
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self.WATCH_MASK)
+            if wd < 0:
+                if ctypes.get_errno() == 28:  # ENOSPC: fs.inotify.max_user_watches reached
+                    return False
+                continue  # Directory vanished meanwhile; its parent's events cover it.
+            self._wd_to_path[wd] = path
+            self._path_to_wd[path] = wd
+        return True
+
+    def read(self, timeout):
+        """Waits up to `timeout` seconds; returns (changed files, changed dirs, overflowed)."""
+        changed_files, changed_dirs, overflow = set(), set(), False
+        if not select.select([self._fd], [], [], timeout)[0]:
+            return changed_files, changed_dirs, overflow
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, name_len = self._EVENT.unpack_from(data, offset)
+                offset += self._EVENT.size
+                name = os.fsdecode(data[offset:offset + name_len].rstrip(b"\0"))
+                offset += name_len
+                if mask & self.IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                dir_path = self._wd_to_path.get(wd)
+                if dir_path is None:
+                    continue
+                if mask & self.IN_IGNORED:
+                    del self._wd_to_path[wd]
+                    self._path_to_wd.pop(dir_path, None)
+                if mask & (self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+                    changed_dirs.add(dir_path)
+                if not name:
+                    continue
+                path = os.path.join(dir_path, name)
+                if mask & self.LISTING_EVENTS:
+                    changed_dirs.add(dir_path)
+                    if name == '.gitignore':
+                        changed_files.add(path)
+                if mask & self.CONTENT_EVENTS:
+                    changed_files.add(path)
+        return changed_files, changed_dirs, overflow
+
+    def close(self):
+        os.close(self._fd)
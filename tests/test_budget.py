@@ -0,0 +1,150 @@
+"""
+The token budget (`max_tokens`, `truncate_last`) on fresh drops: what is
+left out or cut short, the size cap, and the same result whatever the number
+of reader threads.
+
+    python -m pytest tests
+"""
+import os
+
+import pytest
+
+from clipboardconcat.core import (
+    APPENDED_INSTRUCTIONS_HEADER, CHARS_PER_TOKEN, FILE_HEADER_PREFIX, FILE_SEPARATOR, SKIP_EXTENSION,
+    TRUNCATION_MARKER, ConcatStats, FileFilter, TokenBudget, concat_paths, folder_file_header, iter_files,
+)
+from clipboardconcat.watch import IncrementalConcat
+
+INSTRUCTIONS = "Review this."
+FILE_LINES = "line of text number {}\n"
+
+
+@pytest.fixture
+def tree(tmp_path):
+    # Enough files that a parallel drop still has reads in flight when the budget runs out.
+    root = tmp_path / "tree"
+    for d in range(3):
+        sub = root / f"dir{d}"
+        sub.mkdir(parents=True)
+        for f in range(30):
+            (sub / f"file{f:02}.txt").write_text("".join(FILE_LINES.format(i) for i in range(f % 7 * 8 + 1)),
+                                                 encoding="utf-8")
+            if f % 5 == 0:
+                (sub / f"image{f:02}.png").write_text("not read\n", encoding="utf-8")
+    return str(root)
+
+
+def file_count(root, ext):
+    return sum(name.endswith(ext) for _, _, names in os.walk(root) for name in names)
+
+
+def section_of(text, header):
+    """The content emitted after `header`, up to the next header or the instructions."""
+    start = text.index(header) + len(header)
+    end = text.find(FILE_SEPARATOR + "---", start)
+    return text[start:end if end != -1 else len(text)]
+
+
+@pytest.mark.parametrize("truncate", [False, True], ids=["skip", "truncate"])
+@pytest.mark.parametrize("max_tokens", [0, 30, 100, 250, 600])
+@pytest.mark.parametrize("instructions", ["", INSTRUCTIONS])
+def test_output_stays_within_budget(tree, max_tokens, truncate, instructions):
+    text, stats = concat_paths([tree], instructions, max_tokens=max_tokens, truncate_last=truncate, read_workers=1)
+    assert stats.budget_reached
+    assert len(text) == stats.output_chars
+    reserved = len(APPENDED_INSTRUCTIONS_HEADER) + len(instructions) if instructions else 0
+    if reserved <= max_tokens * CHARS_PER_TOKEN:
+        assert len(text) <= max_tokens * CHARS_PER_TOKEN
+    else:  # The instructions are always emitted, even alone over the budget.
+        assert FILE_HEADER_PREFIX not in text
+
+
+@pytest.mark.parametrize("max_tokens", [100, 400])
+def test_skip_leaves_the_first_file_that_does_not_fit_out(tree, max_tokens):
+    text, stats = concat_paths([tree], max_tokens=max_tokens, read_workers=1)
+    assert TRUNCATION_MARKER not in text
+    assert stats.budget_truncated_file is None
+    assert stats.budget_left_out
+    for file_path in stats.budget_left_out:
+        assert folder_file_header(tree, file_path) not in text
+    # Every file that made it in is complete.
+    walked = [file_path for file_path, _ in iter_files([tree], ConcatStats())]
+    for file_path in walked[:stats.files_processed_count]:
+        with open(file_path, encoding="utf-8") as f:
+            assert section_of(text, folder_file_header(tree, file_path)) == f.read()
+
+
+@pytest.mark.parametrize("max_tokens", [100, 150, 200])
+def test_truncate_cuts_the_last_file_at_a_line_boundary(tree, max_tokens):
+    text, stats = concat_paths([tree], INSTRUCTIONS, max_tokens=max_tokens, truncate_last=True, read_workers=1)
+    truncated = stats.budget_truncated_file
+    assert truncated is not None
+    assert text.count(TRUNCATION_MARKER) == 1
+    assert truncated not in stats.budget_left_out
+    kept = section_of(text, folder_file_header(tree, truncated))
+    assert kept.endswith(TRUNCATION_MARKER)
+    kept = kept[:-len(TRUNCATION_MARKER)]
+    with open(truncated, encoding="utf-8") as f:
+        content = f.read()
+    assert content.startswith(kept) and kept.endswith("\n") and len(kept) < len(content)
+    assert len(text) <= max_tokens * CHARS_PER_TOKEN
+
+
+def test_truncation_cuts_inside_a_long_line():
+    budget = TokenBudget(20, truncate=True)
+    header = "--- Content from: a.txt ---\n"
+    kept = budget.admit(header, "x" * 200)
+    assert kept.endswith("\n" + TRUNCATION_MARKER)
+    assert len(header) + len(kept) <= 20 * CHARS_PER_TOKEN
+    assert budget.exhausted
+    assert budget.admit(header, "") is None
+
+
+def test_budget_too_small_for_the_marker_leaves_the_file_out():
+    budget = TokenBudget(10, truncate=True)
+    assert budget.admit("--- Content from: a.txt ---\n", "a\n" * 50) is None
+    assert budget.exhausted
+
+
+def test_files_that_fit_are_admitted_unchanged():
+    budget = TokenBudget(1000)
+    content = "short\n"
+    assert budget.admit("--- Content from: a.txt ---\n", content) is content
+    assert not budget.exhausted
+
+
+@pytest.mark.parametrize("truncate", [False, True], ids=["skip", "truncate"])
+@pytest.mark.parametrize("max_tokens", [30, 250, 600])
+def test_parallel_drop_matches_serial(tree, max_tokens, truncate):
+    file_filter = FileFilter(denied_extensions={".png"})
+    expected, serial = concat_paths([tree], INSTRUCTIONS, max_tokens=max_tokens, truncate_last=truncate,
+                                    file_filter=file_filter, read_workers=1)
+    for read_workers in (2, 8):
+        text, stats = concat_paths([tree], INSTRUCTIONS, max_tokens=max_tokens, truncate_last=truncate,
+                                   file_filter=file_filter, read_workers=read_workers)
+        assert text == expected
+        assert stats.budget_left_out == serial.budget_left_out
+        assert stats.budget_truncated_file == serial.budget_truncated_file
+        assert stats.skip_counts == serial.skip_counts
+        assert stats.files_processed_count == serial.files_processed_count
+
+
+@pytest.mark.parametrize("read_workers", [1, 8])
+def test_files_rejected_by_extension_are_skipped_not_left_out(tree, read_workers):
+    file_filter = FileFilter(denied_extensions={".png"})
+    _, stats = concat_paths([tree], max_tokens=100, file_filter=file_filter, read_workers=read_workers)
+    assert stats.budget_left_out
+    assert not any(file_path.endswith(".png") for file_path in stats.budget_left_out)
+    assert stats.skip_counts == {SKIP_EXTENSION: file_count(tree, ".png")}
+    assert stats.files_processed_count + len(stats.budget_left_out) == file_count(tree, ".txt")
+
+    model = IncrementalConcat([tree], file_filter=file_filter, max_tokens=100)
+    model.build(read_workers=read_workers)
+    assert model.current_stats.budget_left_out == stats.budget_left_out
+    assert model.current_stats.skip_counts == stats.skip_counts
+
+
+def test_left_out_files_are_listed_in_output_order(tree):
+    walked = [file_path for file_path, _ in iter_files([tree], ConcatStats())]
+    _, stats = concat_paths([tree], max_tokens=100, read_workers=8)
+    assert stats.budget_left_out == walked[stats.files_processed_count:]
@@ -0,0 +1,68 @@
+"""
+ContentCache across repeated drops, the way the app uses it: one cache open
+for the whole session while every drop starts its own reader threads.
+
+    python -m pytest tests
+"""
+import os
+
+import pytest
+
+from clipboardconcat.cache import ContentCache
+from clipboardconcat.core import concat_paths
+from clipboardconcat.watch import IncrementalConcat
+
+READ_WORKERS = 8
+RUNS = 20
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "tree"
+    for d in range(4):
+        sub = root / f"dir{d}"
+        sub.mkdir(parents=True)
+        for f in range(50):
+            (sub / f"file{f}.txt").write_text(f"content {d} {f}\n" * 20, encoding="utf-8")
+    # Old enough to be cached (see RACY_WINDOW_NS).
+    for path in root.rglob("*"):
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns - 10 * 10**9))
+    return str(root)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ContentCache(str(tmp_path / "cache"))
+    yield cache
+    cache.close()
+
+
+def open_fd_count():
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:  # No procfs (macOS, Windows): rely on reader_count alone.
+        return None
+
+
+def test_reader_connections_stay_flat_across_drops(tree, cache):
+    expected, _ = concat_paths([tree], read_workers=READ_WORKERS, cache=cache)
+    readers, fds = cache.reader_count, open_fd_count()
+    assert 1 <= readers <= READ_WORKERS
+    for _ in range(RUNS):
+        text, stats = concat_paths([tree], read_workers=READ_WORKERS, cache=cache)
+        assert text == expected
+        assert stats.cache_misses == 0
+        IncrementalConcat([tree], cache=cache).build(read_workers=READ_WORKERS)
+    assert cache.reader_count <= READ_WORKERS
+    if fds is not None:
+        # Pool connections opened by later runs are bounded by READ_WORKERS, each with its WAL files.
+        assert open_fd_count() <= fds + 3 * (READ_WORKERS - readers)
+
+
+def test_close_closes_reader_connections(tree, tmp_path):
+    cache = ContentCache(str(tmp_path / "cache"))
+    concat_paths([tree], read_workers=READ_WORKERS, cache=cache)
+    assert cache.reader_count
+    cache.close()
+    assert cache.reader_count == 0
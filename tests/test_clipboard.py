@@ -0,0 +1,123 @@
+"""
+ClipboardCopy against FakeClipboard: the worker-thread and UI-thread (`step`)
+paths, cancelling mid-transfer, and how the chunks are regrouped.
+
+    python -m pytest tests
+"""
+import time
+
+import pytest
+
+from clipboardconcat.clipboard import ClipboardCopy, ClipboardError, FakeClipboard, rechunk
+from clipboardconcat.watch import IncrementalConcat
+
+TEXT_CHUNKS = ["plain ascii\n", "é and ü\n" * 50, "😀 beyond the BMP\n", "x" * 300, "", "end"]
+TEXT = "".join(TEXT_CHUNKS)
+
+
+def copy_with(backend, chunks, chunk_chars=64):
+    copy = ClipboardCopy(backend, chunks, chunk_chars=chunk_chars)
+    copy.start()
+    assert copy.wait(timeout=10)
+    return copy
+
+
+@pytest.mark.parametrize("thread_safe", [True, False], ids=["worker", "step"])
+def test_copy_transfers_the_text(thread_safe):
+    backend = FakeClipboard(thread_safe=thread_safe)
+    copy = copy_with(backend, iter(TEXT_CHUNKS))
+    assert copy.error is None
+    assert backend.text == TEXT
+    assert copy.chars == len(TEXT)
+    assert copy.bytes == len(TEXT.encode("utf-8"))
+    assert all(len(chunk) >= 64 for chunk in backend.chunks[:-1])
+
+
+def test_binary_backend_gets_utf8_bytes():
+    backend = FakeClipboard()
+    backend.binary = True
+    copy = copy_with(backend, TEXT_CHUNKS)
+    assert b"".join(backend.chunks) == TEXT.encode("utf-8")
+    assert copy.bytes == len(TEXT.encode("utf-8"))
+
+
+def test_step_writes_on_the_calling_thread():
+    backend = FakeClipboard(thread_safe=False)
+    copy = ClipboardCopy(backend, TEXT_CHUNKS, chunk_chars=64)
+    copy.start()
+    deadline = time.monotonic() + 10
+    while not copy.step():
+        assert time.monotonic() < deadline
+    assert copy.error is None
+    assert backend.text == TEXT
+
+
+def test_failing_source_sets_error():
+    def chunks():
+        yield "partial"
+        raise OSError("disk gone")
+
+    for thread_safe in (True, False):
+        backend = FakeClipboard(thread_safe=thread_safe)
+        copy = copy_with(backend, chunks())
+        assert isinstance(copy.error, OSError)
+        assert backend.text is None
+
+
+@pytest.fixture
+def model(tmp_path):
+    root = tmp_path / "tree"
+    root.mkdir()
+    for i in range(40):
+        (root / f"file{i:02}.txt").write_text(f"line {i}\n" * 50, encoding="utf-8")
+    model = IncrementalConcat([str(root)])
+    assert model.build(read_workers=1)
+    return model
+
+
+@pytest.mark.parametrize("thread_safe", [True, False], ids=["worker", "step"])
+def test_cancel_mid_transfer_releases_the_source(model, thread_safe):
+    backend = FakeClipboard(delay=0.005, thread_safe=thread_safe)
+    copy = ClipboardCopy(backend, model.iter_chunks(), chunk_chars=64)
+    copy.start()
+    deadline = time.monotonic() + 10
+    while not backend._pending:  # Some pieces written, more to come.
+        assert time.monotonic() < deadline
+        copy.step()
+        time.sleep(0.001)
+    assert not copy.done
+    copy.cancel()
+    assert copy.wait(timeout=10)
+    assert isinstance(copy.error, ClipboardError)
+    assert backend.text is None
+    # The worker closes iter_chunks, which holds the model's lock while suspended.
+    assert model.lock.acquire(timeout=10)
+    model.lock.release()
+
+
+def test_full_transfer_from_model(model):
+    backend = FakeClipboard(thread_safe=False)
+    copy = copy_with(backend, model.iter_chunks(), chunk_chars=1000)
+    assert copy.error is None
+    assert backend.text == model.read_text()
+    assert model.lock.acquire(timeout=10)
+    model.lock.release()
+
+
+@pytest.mark.parametrize("chunks, size, expected", [
+    (["ab", "cd", "e"], 3, ["abcd", "e"]),
+    (["abc", "d"], 3, ["abc", "d"]),
+    (["a", "bcdef", "g"], 3, ["abcdef", "g"]),
+    (["abcdef", "g", "h"], 3, ["abcdef", "gh"]),
+    (["a", "b", "c"], 3, ["abc"]),
+    ([], 3, []),
+    (["", ""], 3, [""]),
+])
+def test_rechunk_boundaries(chunks, size, expected):
+    assert list(rechunk(chunks, size)) == expected
+
+
+def test_rechunk_keeps_the_text():
+    pieces = list(rechunk(TEXT_CHUNKS, 100))
+    assert "".join(pieces) == TEXT
+    assert all(len(piece) >= 100 for piece in pieces[:-1])
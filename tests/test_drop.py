@@ -0,0 +1,132 @@
+"""
+Drop payload parsing: `split_tcl_list` checked against Tcl's own splitlist,
+and `parse_drop_data` / `resolve_drop_paths` on the payload shapes
+tkinterdnd2 produces.
+
+    python -m pytest tests
+"""
+import os
+import random
+
+import pytest
+
+try:
+    import tkinter
+except ImportError:  # Python built without Tk.
+    tkinter = None
+
+from clipboardconcat.drop import parse_drop_data, resolve_drop_paths, split_tcl_list
+
+LISTS = [
+    "a b c",
+    "{a b} c",
+    "{a {b c} d} e",
+    '"a b" c',
+    r"a\ b c",
+    r"a\101b \x41 \x414 \u00e9 \U000e9",
+    r"\777 \400 \3777 \8 \0",
+    r"\x \u \U \xg \n\t\a",
+    "a\\",
+    "a\\\\",
+    "a\\\n   b",
+    "{a\\}b} {a\\{b}",
+    "  \t leading and trailing \n ",
+]
+MALFORMED = ["{a", '"a', "{a}b", '"a"b', '"a\\"']
+ALPHABET = list('ab \\{}"\n\t01234789xuUAfFg')
+
+
+@pytest.fixture(scope="module")
+def tcl():
+    if tkinter is None:
+        pytest.skip("tkinter is not available")
+    return tkinter.Tcl()
+
+
+@pytest.mark.parametrize("data", LISTS)
+def test_split_matches_tcl(tcl, data):
+    assert split_tcl_list(data) == list(tcl.splitlist(data))
+
+
+@pytest.mark.parametrize("data", MALFORMED)
+def test_malformed_list_raises(tcl, data):
+    with pytest.raises(ValueError):
+        split_tcl_list(data)
+    with pytest.raises(tkinter.TclError):
+        tcl.splitlist(data)
+
+
+def test_random_lists_match_tcl(tcl):
+    rng = random.Random(0)
+    for _ in range(20000):
+        data = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 14)))
+        try:
+            expected = list(tcl.splitlist(data))
+        except tkinter.TclError:
+            with pytest.raises(ValueError):
+                split_tcl_list(data)
+        else:
+            # Tk 8.6 hands characters beyond the BMP to Python as U+FFFD.
+            if "\ufffd" not in "".join(expected):
+                assert split_tcl_list(data) == expected, data
+
+
+def test_characters_beyond_the_bmp():
+    assert split_tcl_list(r"\U0001f600 \U110000") == ["\U0001f600", "\U00011000" + "0"]
+
+
+def test_trailing_backslash_is_kept():
+    assert split_tcl_list("a\\") == ["a\\"]
+    assert split_tcl_list("a \\") == ["a", "\\"]
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / "my folder" / "sub").mkdir(parents=True)
+    (tmp_path / "my folder" / "sub" / "inner.txt").write_text("x", encoding="utf-8")
+    (tmp_path / "notes file.txt").write_text("x", encoding="utf-8")
+    (tmp_path / "plain.txt").write_text("x", encoding="utf-8")
+    return str(tmp_path)
+
+
+def test_braced_items(tree):
+    folder, notes = os.path.join(tree, "my folder"), os.path.join(tree, "notes file.txt")
+    assert parse_drop_data(f"{{{folder}}} {{{notes}}}") == [folder, notes]
+
+
+def test_escaped_items(tree):
+    notes, plain = os.path.join(tree, "notes file.txt"), os.path.join(tree, "plain.txt")
+    assert parse_drop_data(notes.replace(" ", "\\ ") + " " + plain) == [notes, plain]
+
+
+def test_unescaped_items_with_spaces(tree):
+    folder, notes, plain = (os.path.join(tree, name) for name in ("my folder", "notes file.txt", "plain.txt"))
+    assert parse_drop_data(f"{folder} {notes} {plain}") == [folder, notes, plain]
+
+
+def test_nul_separated_items(tree):
+    notes, plain = os.path.join(tree, "notes file.txt"), os.path.join(tree, "plain.txt")
+    assert parse_drop_data(f"{notes}\0{plain}\0") == [notes, plain]
+
+
+def test_duplicates_are_kept_once(tree):
+    notes = os.path.join(tree, "notes file.txt")
+    paths, redundant = resolve_drop_paths([notes, notes, os.path.join(tree, ".", "notes file.txt")])
+    assert paths == [notes]
+    assert redundant == 2
+
+
+def test_file_inside_a_dropped_folder_is_redundant(tree):
+    folder = os.path.join(tree, "my folder")
+    inner = os.path.join(folder, "sub", "inner.txt")
+    plain = os.path.join(tree, "plain.txt")
+    paths, redundant = resolve_drop_paths([inner, folder, plain, os.path.join(folder, "sub")])
+    assert paths == [folder, plain]
+    assert redundant == 2
+
+
+def test_missing_items_are_dropped_without_counting(tree):
+    plain = os.path.join(tree, "plain.txt")
+    paths, redundant = resolve_drop_paths([os.path.join(tree, "missing.txt"), plain, "  "])
+    assert paths == [plain]
+    assert redundant == 0
@@ -0,0 +1,221 @@
+"""
+GitignoreRules checked against git itself.
+
+Each case builds a tree with nested .gitignore files, runs the same single
+topdown walk the app does (`iter_files`) and compares the files it keeps with
+`git ls-files --others --exclude-standard` in a fresh repository. A fixed
+corpus covers negations, anchoring, directory-only and `**` patterns; a
+seeded random corpus mixes them across nesting levels. Skipped when git or
+pathspec is not installed.
+
+    python -m pytest tests
+"""
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+
+import pytest
+
+from clipboardconcat import ignore
+from clipboardconcat.cache import CACHE_FILE_NAME, ContentCache
+from clipboardconcat.core import ConcatStats, iter_files
+from clipboardconcat.ignore import PATHSPEC_AVAILABLE, RACY_WINDOW_NS, clear_spec_cache, spec_format
+
+pytestmark = [
+    pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed"),
+    pytest.mark.skipif(not PATHSPEC_AVAILABLE, reason="pathspec is not installed"),
+]
+
+# Only the repository's own .gitignore files may count: no global excludes
+# file, no system or user configuration.
+GIT_ENV = dict(os.environ, GIT_CONFIG_NOSYSTEM="1", GIT_CONFIG_GLOBAL=os.devnull, HOME=os.devnull)
+
+# (name, {relative path: content}); paths ending in '.gitignore' hold rules,
+# every other file only has to exist.
+CORPUS = [
+    ("negated extension", {
+        ".gitignore": "*.log\n!keep.log\n",
+        "a.log": "", "keep.log": "", "src/b.log": "", "src/keep.log": "", "src/main.py": "",
+    }),
+    ("anchored", {
+        ".gitignore": "/build\n/docs/*.html\n",
+        "build/out.o": "", "src/build/x.py": "", "docs/a.html": "", "docs/sub/b.html": "", "a.html": "",
+    }),
+    ("pattern with a slash is anchored", {
+        ".gitignore": "src/gen\n",
+        "src/gen/a.py": "", "lib/src/gen/b.py": "", "src/general.py": "",
+    }),
+    ("directory only", {
+        ".gitignore": "cache/\nlogs/\n",
+        "cache/x": "", "sub/cache/y": "", "logs": "", "src/logs": "", "keep/logs.txt": "",
+    }),
+    ("double star", {
+        ".gitignore": "**/tmp\na/**/b\nx/**\n**/*.bak\n",
+        "tmp/1": "", "deep/er/tmp/2": "", "a/b": "", "a/m/n/b": "", "a/c": "", "x/y/z": "", "y/x": "",
+        "q/w.bak": "", "w.bak.txt": "",
+    }),
+    ("excluded parent cannot be re-included", {
+        ".gitignore": "vendor/\n!vendor/keep.py\n*.tmp\n!*/\n",
+        "vendor/keep.py": "", "vendor/other.py": "", "d/x.tmp": "", "d/y.txt": "",
+    }),
+    ("nested file overrides its parent", {
+        ".gitignore": "*.txt\n",
+        "a.txt": "", "sub/.gitignore": "!*.txt\nsecret.txt\n", "sub/b.txt": "", "sub/secret.txt": "",
+        "sub/deep/c.txt": "", "other/d.txt": "",
+    }),
+    ("nested anchored and directory rules", {
+        ".gitignore": "out/\n",
+        "pkg/.gitignore": "/local\n*.pyc\n!important.pyc\nnode_modules/\n",
+        "pkg/local/a": "", "pkg/sub/local/b": "", "pkg/m.pyc": "", "pkg/important.pyc": "",
+        "pkg/sub/important.pyc": "", "pkg/web/node_modules/z.js": "", "pkg/out/q": "", "local/c": "",
+    }),
+    ("character classes and wildcards", {
+        ".gitignore": "file[0-9].txt\n?.md\n[!a]*.cfg\n",
+        "file1.txt": "", "filex.txt": "", "a.md": "", "ab.md": "", "a.cfg": "", "b.cfg": "", "s/file2.txt": "",
+    }),
+    ("comments, blanks and escapes", {
+        ".gitignore": "# comment\n\n\\#hash\n\\!bang\n  \nspace\\ name\n",
+        "#hash": "", "!bang": "", "# comment": "", "space name": "", "plain": "",
+    }),
+    ("re-included directory keeps its files", {
+        ".gitignore": "vendor\nbuild\n!*/\n",
+        "vendor/x.py": "", "vendor/sub/y.py": "", "build": "", "src/build/z.py": "",
+    }),
+    ("negated directory", {
+        ".gitignore": "docs/*\n!docs/api/\ndocs/api/*.tmp\n",
+        "docs/a.md": "", "docs/api/b.md": "", "docs/api/c.tmp": "", "docs/api/deep/d.tmp": "",
+    }),
+]
+
+NAMES = ["a", "b", "build", "src", "keep", "tmp", "lib"]
+EXTS = ["", ".log", ".py", ".txt", ".tmp"]
+RULES = [
+    "*.log", "!*.log", "*.tmp", "!keep*", "build", "build/", "/build", "src/*", "!src/keep*", "**/tmp",
+    "a/**/b", "lib/**", "*.py", "!a.py", "b*", "!b/", "/a", "tmp/", "keep", "!*/", "*/", "**/*.txt",
+    "src/**/*.py", "[ab].txt", "!lib/b*", "lib/*.log",
+]
+
+
+def random_tree(rng):
+    files = {}
+    for _ in range(rng.randint(10, 30)):
+        depth = rng.randint(0, 3)
+        parts = [rng.choice(NAMES) for _ in range(depth)]
+        parts.append(rng.choice(NAMES) + rng.choice(EXTS))
+        files["/".join(parts)] = ""
+    # Names used as both a file and a directory cannot coexist; keep the deeper one.
+    dirs = {path.rsplit("/", 1)[0] for path in files if "/" in path}
+    prefixes = {"/".join(d.split("/")[:i]) for d in dirs for i in range(1, d.count("/") + 2)}
+    files = {path: "" for path in files if path not in prefixes}
+    gitignore_dirs = [""] + sorted(prefixes)
+    for dir_path in rng.sample(gitignore_dirs, min(len(gitignore_dirs), rng.randint(1, 3))):
+        rules = rng.sample(RULES, rng.randint(1, 5))
+        files[(dir_path + "/" if dir_path else "") + ".gitignore"] = "\n".join(rules) + "\n"
+    return files
+
+
+def write_tree(root, files, age_seconds=0):
+    for rel_path, content in files.items():
+        path = os.path.join(root, *rel_path.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+        if age_seconds:
+            st = os.stat(path)
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns - age_seconds * 10**9))
+
+
+def git_kept_files(root):
+    subprocess.run(["git", "init", "-q", root], check=True, env=GIT_ENV)
+    listing = subprocess.run(
+        ["git", "ls-files", "-z", "--others", "--exclude-standard"],
+        cwd=root, check=True, capture_output=True, env=GIT_ENV,
+    ).stdout
+    return {os.fsdecode(path) for path in listing.split(b"\0") if path}
+
+
+def walk_kept_files(root, store=None):
+    kept = set()
+    for file_path, _ in iter_files([root], ConcatStats(), cache=store):
+        kept.add(os.path.relpath(file_path, root).replace(os.sep, "/"))
+    return kept
+
+
+def check_against_git(root, files, store=None):
+    clear_spec_cache()
+    write_tree(root, files, age_seconds=2 * RACY_WINDOW_NS // 10**9)
+    expected = git_kept_files(root)
+    assert walk_kept_files(root) == expected
+    if store is not None:
+        # Compiled once into the store, then served from it with the in-memory cache empty.
+        clear_spec_cache()
+        assert walk_kept_files(root, store) == expected
+        clear_spec_cache()
+        assert walk_kept_files(root, store) == expected
+
+
+@pytest.mark.parametrize("name, files", CORPUS, ids=[name for name, _ in CORPUS])
+def test_corpus_matches_git(tmp_path, name, files):
+    check_against_git(str(tmp_path / "tree"), files)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_random_trees_match_git(tmp_path, seed):
+    check_against_git(str(tmp_path / "tree"), random_tree(random.Random(seed)))
+
+
+def test_pathspec_regex_layout():
+    # _compile_gitignore rewrites these parts of pathspec's private regexes.
+    import pathspec
+
+    def regex(line):
+        return pathspec.patterns.GitWildMatchPattern(line).regex.pattern
+
+    assert regex("build").endswith(ignore._PS_ANY_SUFFIX)
+    assert regex("build/").endswith(ignore._PS_DIR_SUFFIX)
+    assert regex("*.log").startswith(ignore._PS_ANY_DIR_PREFIX)
+
+
+def test_patterns_from_store_match_git(tmp_path):
+    cache = ContentCache(str(tmp_path / "cache"))
+    try:
+        for i, (_, files) in enumerate(CORPUS):
+            check_against_git(str(tmp_path / f"tree{i}"), files, store=cache)
+    finally:
+        cache.close()
+
+
+def test_stored_patterns_of_another_format_are_not_used(tmp_path):
+    name, files = CORPUS[0]
+    root = str(tmp_path / "tree")
+    write_tree(root, files, age_seconds=2 * RACY_WINDOW_NS // 10**9)
+    gitignore_path = os.path.join(root, ".gitignore")
+    st = os.stat(gitignore_path)
+    cache = ContentCache(str(tmp_path / "cache"))
+    try:
+        # What an older pathspec (or rewriting) might have stored: ignores everything.
+        stale_key = (st.st_ino, st.st_size, st.st_mtime_ns, "0/pathspec:old")
+        cache.put_ignore_patterns(gitignore_path, stale_key, [("^.*$", True, True, False)])
+        assert cache.get_ignore_patterns(gitignore_path, stale_key[:3] + (spec_format(),)) is None
+        clear_spec_cache()
+        assert walk_kept_files(root, cache) == git_kept_files(root)
+    finally:
+        cache.close()
+
+
+def test_ignore_specs_table_without_format_is_dropped(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    conn = sqlite3.connect(str(cache_dir / CACHE_FILE_NAME))
+    conn.execute("CREATE TABLE ignore_specs ("
+                 " path TEXT PRIMARY KEY, inode INTEGER, size INTEGER, mtime_ns INTEGER, patterns TEXT)")
+    conn.execute("INSERT INTO ignore_specs VALUES ('/x/.gitignore', 1, 2, 3, '[]')")
+    conn.commit()
+    conn.close()
+    cache = ContentCache(str(cache_dir))
+    try:
+        assert cache.get_ignore_patterns("/x/.gitignore", (1, 2, 3, spec_format())) is None
+    finally:
+        cache.close()
@@ -0,0 +1,126 @@
+"""
+IncrementalConcat patched through the polling path, checked against a fresh
+`concat_paths` of the same tree after every change.
+
+    python -m pytest tests
+"""
+import os
+import shutil
+
+import pytest
+
+from clipboardconcat.core import concat_paths
+from clipboardconcat.ignore import PATHSPEC_AVAILABLE
+from clipboardconcat.watch import IncrementalConcat
+
+pytestmark = pytest.mark.skipif(not PATHSPEC_AVAILABLE, reason="pathspec is not installed")
+
+INSTRUCTIONS = "Review this."
+COMPARED_STATS = (
+    "dirs_visited", "files_scanned", "files_processed_count", "skip_counts", "git_ignored_count",
+    "git_ignored_dir_count", "bytes_read", "duplicate_count", "duplicate_bytes_saved", "budget_left_out",
+    "budget_truncated_file", "output_chars", "output_lines",
+)
+
+TREE = {
+    ".gitignore": "*.log\nbuild/\n",
+    "README.md": "# Project\n",
+    "main.py": "print('main')\n" * 5,
+    "copy_of_main.py": "print('main')\n" * 5,
+    "debug.log": "ignored\n",
+    "build/out.txt": "ignored\n",
+    "image.png": "\x89PNG\r\n\x1a\n binary",
+    "src/.gitignore": "generated.py\n",
+    "src/app.py": "def app():\n    return 1\n" * 10,
+    "src/generated.py": "GENERATED = True\n",
+    "src/util/helpers.py": "def helper():\n    pass\n" * 8,
+    "src/util/same.py": "def app():\n    return 1\n" * 10,
+}
+
+
+def write(root, rel_path, content):
+    path = os.path.join(root, *rel_path.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(content)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = str(tmp_path / "tree")
+    for rel_path, content in TREE.items():
+        write(root, rel_path, content)
+    return root
+
+
+def assert_matches_fresh_drop(model, paths, **options):
+    expected, stats = concat_paths(paths, INSTRUCTIONS, read_workers=1, **options)
+    assert model.read_text() == expected
+    for name in COMPARED_STATS:
+        assert getattr(model.current_stats, name) == getattr(stats, name), name
+
+
+def apply_polled_changes(model):
+    changed_files, changed_dirs = model.poll_changes()
+    assert changed_files or changed_dirs
+    model.apply_changes(changed_files, changed_dirs)
+
+
+def edit(root, rel_path, content):
+    write(root, rel_path, content)
+    # A later mtime even on file systems with coarse timestamps.
+    path = os.path.join(root, *rel_path.split("/"))
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+CHANGES = [
+    ("modify a file", lambda root: edit(root, "src/app.py", "def app():\n    return 2\n")),
+    ("add a file", lambda root: write(root, "src/util/new.py", "NEW = 1\n")),
+    ("delete a file", lambda root: os.remove(os.path.join(root, "main.py"))),
+    ("rename a file", lambda root: os.rename(os.path.join(root, "README.md"), os.path.join(root, "INTRO.md"))),
+    ("add a directory", lambda root: write(root, "docs/guide/intro.md", "Intro\n")),
+    ("delete a directory", lambda root: shutil.rmtree(os.path.join(root, "src", "util"))),
+    ("edit a nested .gitignore", lambda root: edit(root, "src/.gitignore", "app.py\n")),
+    ("edit the top .gitignore", lambda root: edit(root, ".gitignore", "*.md\n")),
+    ("make a file a duplicate", lambda root: edit(root, "src/util/helpers.py", "print('main')\n" * 5)),
+]
+
+OPTIONS = [
+    {},
+    {"dedup": True},
+    {"max_tokens": 60},
+    {"max_tokens": 60, "truncate_last": True},
+    {"max_tokens": 120, "truncate_last": True, "dedup": True},
+]
+
+
+@pytest.mark.parametrize("options", OPTIONS, ids=lambda options: ",".join(f"{k}={v}" for k, v in options.items()) or "plain")
+@pytest.mark.parametrize("name, change", CHANGES, ids=[name for name, _ in CHANGES])
+def test_change_matches_fresh_drop(tree, name, change, options):
+    model = IncrementalConcat([tree], INSTRUCTIONS, **options)
+    assert model.build(read_workers=1)
+    assert_matches_fresh_drop(model, [tree], **options)
+    change(tree)
+    apply_polled_changes(model)
+    assert_matches_fresh_drop(model, [tree], **options)
+
+
+def test_series_of_changes_with_dropped_files(tree):
+    paths = [tree, os.path.join(os.path.dirname(tree), "extra.txt")]
+    write(os.path.dirname(tree), "extra.txt", "extra\n")
+    model = IncrementalConcat(paths, INSTRUCTIONS, dedup=True)
+    assert model.build(read_workers=2)
+    for _, change in CHANGES:
+        change(tree)
+        apply_polled_changes(model)
+        assert_matches_fresh_drop(model, paths, dedup=True)
+    edit(os.path.dirname(tree), "extra.txt", "changed extra\n")
+    apply_polled_changes(model)
+    assert_matches_fresh_drop(model, paths, dedup=True)
+
+
+def test_unchanged_tree_polls_nothing(tree):
+    model = IncrementalConcat([tree], INSTRUCTIONS)
+    model.build()
+    assert model.poll_changes() == (set(), set())